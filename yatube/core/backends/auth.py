@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core import surrogate
+
+USER_KEY = 'auth:user:{}'
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def user_surrogate_key(user_id):
+    return f'auth-user-{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+    surrogate.purge(user_surrogate_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кеша.
+
+    AuthenticationMiddleware вызывает get_user на каждом запросе;
+    запись сбрасывается сигналами core.signals при сохранении
+    и удалении пользователя и при выходе. Сброс, пришедший между
+    чтением из БД и записью в кеш, не даст сохранить прочитанного
+    до него пользователя (см. surrogate.store).
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = surrogate.fetch(key)
+        if user is None:
+            started = surrogate.start()
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            surrogate.store(
+                key, user, [user_surrogate_key(user_id)],
+                settings.AUTH_USER_CACHE_TIMEOUT, started,
+            )
+        return user if self.user_can_authenticate(user) else None
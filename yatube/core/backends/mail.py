@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+
+from core.mail import ensure_dirs, spool
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """Складывает письма в локальный спул вместо отправки.
+
+    Запрос не ждёт почтовый сервер: письма доставляет команда
+    sendmail (или задача core.send_mail) через EMAIL_SPOOL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        ensure_dirs()
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                spool(message)
+            except Exception:
+                if not self.fail_silently:
+                    raise
+                continue
+            count += 1
+        if count and settings.EMAIL_SPOOL_USE_JOBS:
+            from core.tasks import schedule_send_mail
+
+            schedule_send_mail()
+        return count
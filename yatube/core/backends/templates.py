@@ -0,0 +1,41 @@
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise,
+)
+
+from core.metrics import current_stats
+
+
+class InstrumentedTemplate(Template):
+    """Считает время рендеринга шаблона верхнего уровня."""
+
+    def render(self, context=None, request=None):
+        stats = current_stats()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,20 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.metrics import record_cache_lookup
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    """Отмечает попадания и промахи кеша в метриках текущего запроса."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        record_cache_lookup(value is not _missing)
+        if value is _missing:
+            return default
+        return value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from . import surrogate
+from .middleware.response_cache import AnonymousResponseCacheMiddleware
+
+PLACEHOLDER = '<!--hole:{}-->'
+PLACEHOLDER_RE = re.compile(r'<!--hole:([A-Za-z0-9_=-]+)-->')
+
+_context_functions = {}
+
+
+def hole_context(template_name):
+    """Регистрирует функцию (request, **kwargs) -> dict для «дырки»."""
+    def decorator(func):
+        _context_functions[template_name] = func
+        return func
+    return decorator
+
+
+def render_hole(request, template_name, kwargs):
+    context = dict(kwargs)
+    func = _context_functions.get(template_name)
+    if func is not None and request is not None:
+        context.update(func(request, **kwargs))
+    return render_to_string(template_name, context, request=request)
+
+
+def placeholder(template_name, kwargs):
+    payload = json.dumps([template_name, kwargs], sort_keys=True)
+    return PLACEHOLDER.format(
+        base64.urlsafe_b64encode(payload.encode()).decode()
+    )
+
+
+def fill_holes(content, request):
+    def replace(match):
+        template_name, kwargs = json.loads(
+            base64.urlsafe_b64decode(match.group(1))
+        )
+        return render_hole(request, template_name, kwargs)
+    return PLACEHOLDER_RE.sub(replace, content)
+
+
+def punching_holes(request):
+    return getattr(request, '_punch_holes', False)
+
+
+def page_cache_key(request):
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page_cache:{url}'
+
+
+def freeze(request, response, content):
+    """Страница для кеша: текст с заглушками, статус, заголовки, ключи."""
+    return (
+        AnonymousResponseCacheMiddleware.freeze(request, response, content),
+        surrogate.surrogate_keys(request),
+    )
+
+
+def build(request, cached):
+    """Ответ из кеша страниц с заголовками и ключами исходного ответа."""
+    (content, status, headers), keys = cached
+    surrogate.add_surrogate_keys(request, *keys)
+    return AnonymousResponseCacheMiddleware.build(
+        request, (fill_holes(content, request), status, headers)
+    )
+
+
+def shared_page_cache(timeout=None):
+    """Кеширует страницу целиком, общую для всех пользователей.
+
+    Персональные участки, отмеченные тегом {% hole %}, попадают
+    в кеш заглушками и заполняются заново на каждом запросе.
+    Страница сбрасывается по суррогатным ключам запроса; ответ
+    из кеша получает те же заголовки (Vary, Cache-Control...)
+    и суррогатные ключи, что и отрендеренный.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.PAGE_CACHE_ENABLED
+                    or request.method not in ('GET', 'HEAD')):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request)
+            cached = surrogate.fetch(key)
+            if cached is not None:
+                return build(request, cached)
+            started = surrogate.start()
+            request._punch_holes = True
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                request._punch_holes = False
+            page_timeout = (
+                settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+            )
+            if response.streaming:
+                response.streaming_content = stream_and_store(
+                    response.streaming_content, key, request, response,
+                    page_timeout, started,
+                )
+                return response
+            content = response.content.decode(response.charset)
+            if response.status_code == 200:
+                surrogate.store(
+                    key, freeze(request, response, content),
+                    surrogate.surrogate_keys(request), page_timeout, started,
+                )
+            response.content = fill_holes(content, request)
+            return response
+        return wrapper
+    return decorator
+
+
+def stream_and_store(content, key, request, response, timeout, started):
+    """Заполняет «дырки» в потоке; в кеш — только дошедшая до конца страница.
+
+    Шаблон рендерится по мере отдачи, поэтому заглушки вместо «дырок»
+    включаются на каждый следующий кусок, а не только на вызов
+    представления.
+    """
+    parts = []
+    content = iter(content)
+    while True:
+        request._punch_holes = True
+        try:
+            chunk = next(content, None)
+        finally:
+            request._punch_holes = False
+        if chunk is None:
+            break
+        # Куски режутся по границам узлов шаблона: заглушка
+        # целиком лежит в одном куске.
+        chunk = chunk.decode(response.charset)
+        parts.append(chunk)
+        yield fill_holes(chunk, request)
+    if response.status_code == 200:
+        surrogate.store(
+            key, freeze(request, response, ''.join(parts)),
+            surrogate.surrogate_keys(request), timeout, started,
+        )
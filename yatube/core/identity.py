@@ -0,0 +1,209 @@
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connections, models
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor,
+)
+from django.db.models.query import ModelIterable
+
+from core import metrics
+
+identity_lookups = metrics.REGISTRY.counter(
+    'yatube_identity_map_total',
+    'Identity map lookups by kind (object, query) and result.',
+    ('kind', 'result'),
+)
+
+_local = threading.local()
+
+# Запросы, которые не меняют данных: откат к точке сохранения меняет,
+# поэтому ROLLBACK сюда не входит.
+READ_PREFIXES = ('SELECT', 'SAVEPOINT', 'RELEASE')
+
+
+class IdentityMap:
+    """Загруженные за запрос объекты по pk и результаты чтений по SQL."""
+
+    def __init__(self):
+        self.objects = {}
+        self.queries = {}
+
+    def get(self, model, pk):
+        obj = self.objects.get((model._meta.label, pk))
+        identity_lookups.inc(
+            kind='object', result='miss' if obj is None else 'hit'
+        )
+        return obj
+
+    def add(self, obj):
+        """Запоминает объект; если он уже есть — возвращает прежний."""
+        if obj is None or obj.pk is None:
+            return obj
+        return self.objects.setdefault((obj._meta.label, obj.pk), obj)
+
+    def clear(self):
+        self.objects.clear()
+        self.queries.clear()
+
+
+def current():
+    return getattr(_local, 'map', None)
+
+
+def clear_on_write(execute, sql, params, many, context):
+    """execute_wrapper: любая запись в БД сбрасывает карту целиком."""
+    identity = current()
+    if identity is not None and not sql.lstrip()[:9].upper().startswith(
+        READ_PREFIXES
+    ):
+        identity.clear()
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def clear_on_rollback(connection):
+    """Откат транзакции идёт мимо execute_wrapper: сбрасываем карту и на нём.
+
+    Соединения у каждого потока свои, поэтому rollback подменяется
+    на время запроса прямо у объекта соединения.
+    """
+    rollback = connection.rollback
+
+    def wrapper():
+        identity = current()
+        if identity is not None:
+            identity.clear()
+        return rollback()
+
+    connection.rollback = wrapper
+    try:
+        yield
+    finally:
+        del connection.rollback
+
+
+@contextmanager
+def activate(identity_map=None):
+    """Включает карту в текущем потоке и следит за записями и откатами.
+
+    Переданная карта продолжает работу, начатую раньше: так потоковый
+    ответ рендерится с объектами, загруженными представлением.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(clear_on_write))
+            stack.enter_context(clear_on_rollback(connection))
+        _local.map = (
+            IdentityMap() if identity_map is None else identity_map
+        )
+        try:
+            yield _local.map
+        finally:
+            _local.map = None
+
+
+def tracked(model):
+    return model._meta.label in settings.IDENTITY_MAP_MODELS
+
+
+class IdentityQuerySet(models.QuerySet):
+    """QuerySet, который внутри запроса повторно использует объекты.
+
+    get(pk=...) отдаёт уже загруженный объект без SQL, а одинаковые
+    выборки возвращают один и тот же список. Вне IdentityMapMiddleware
+    ведёт себя как обычный QuerySet. select_for_update() всегда идёт
+    в базу: он нужен ради блокировки.
+    """
+
+    def _plain(self):
+        """Выборка целых объектов без условий: её можно взять из карты.
+
+        values() и values_list() возвращают не объекты, поэтому
+        в карту не смотрят.
+        """
+        query = self.query
+        if self._iterable_class is not ModelIterable or query.values_select:
+            return False
+        return not (
+            query.where or query.select_related or query.annotations
+            or query.deferred_loading[0] or query.select_for_update
+            or self._prefetch_related_lookups
+        )
+
+    def get(self, *args, **kwargs):
+        identity = current()
+        if (identity is not None and not args and len(kwargs) == 1
+                and self._plain()):
+            (name, value), = kwargs.items()
+            pk_field = self.model._meta.pk
+            if name in ('pk', pk_field.name, pk_field.attname):
+                try:
+                    obj = identity.get(self.model, pk_field.to_python(value))
+                except ValidationError:
+                    obj = None
+                # Объект из другой базы (using()) не подходит.
+                if obj is not None and obj._state.db == self.db:
+                    return obj
+        return super().get(*args, **kwargs)
+
+    def _fetch_all(self):
+        identity = current()
+        if (identity is None or self._result_cache is not None
+                or self._prefetch_related_lookups
+                or self.query.select_for_update):
+            return super()._fetch_all()
+        try:
+            sql, params = self.query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            return super()._fetch_all()
+        key = (self.db, self._iterable_class, sql, tuple(params))
+        try:
+            cached = identity.queries.get(key)
+        except TypeError:
+            return super()._fetch_all()
+        identity_lookups.inc(
+            kind='query', result='miss' if cached is None else 'hit'
+        )
+        if cached is not None:
+            self._result_cache = list(cached)
+            return
+        super()._fetch_all()
+        if self._iterable_class is ModelIterable:
+            for obj in self._result_cache:
+                identity.add(obj)
+        identity.queries[key] = list(self._result_cache)
+
+
+IdentityManager = models.Manager.from_queryset(IdentityQuerySet)
+
+
+class IdentityForwardDescriptor(ForwardManyToOneDescriptor):
+    """post.author и подобные берут объект из карты, если он там есть."""
+
+    def get_object(self, instance):
+        identity = current()
+        if identity is None:
+            return super().get_object(instance)
+        model = self.field.remote_field.model
+        obj = identity.get(model, getattr(instance, self.field.attname))
+        if obj is None:
+            obj = identity.add(super().get_object(instance))
+        return obj
+
+
+def install():
+    """Ставит IdentityForwardDescriptor на ключи к отслеживаемым моделям.
+
+    Только для ForeignKey на первичный ключ: у OneToOne свой дескриптор
+    с кешем обратной связи.
+    """
+    for model in apps.get_models():
+        for field in model._meta.local_fields:
+            if (type(field) is models.ForeignKey
+                    and tracked(field.remote_field.model)
+                    and field.target_field.primary_key):
+                setattr(model, field.name, IdentityForwardDescriptor(field))
@@ -0,0 +1,56 @@
+import re
+
+from django.template.loaders import app_directories, filesystem
+
+# Содержимое этих элементов выводится как есть: пробелы в нём значимы.
+PRESERVE_RE = re.compile(
+    r'(<(pre|textarea|script)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+# Условные комментарии IE не трогаем.
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+INDENT_RE = re.compile(r'[ \t\r]*\n[ \t]*')
+# Письма Django (registration/password_reset_email.html) — обычный текст.
+PLAIN_TEXT_SUFFIXES = ('email.html',)
+
+
+def minify(source):
+    """Убирает отступы, хвостовые пробелы и HTML-комментарии.
+
+    Переводы строк сохраняются, чтобы номера строк шаблона
+    в отладочных страницах и журнале медленных запросов
+    оставались верными.
+    """
+    parts = PRESERVE_RE.split(source)
+    result = []
+    # split с двумя группами даёт: текст, элемент, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        text = COMMENT_RE.sub(
+            lambda match: '\n' * match.group().count('\n'), parts[index]
+        )
+        result.append(INDENT_RE.sub('\n', text))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result)
+
+
+class MinifyMixin:
+    """Минифицирует HTML-шаблоны при загрузке исходника.
+
+    Работает до разбора шаблона, поэтому вместе с cached.Loader
+    минификация выполняется один раз на воркер, а не на каждый ответ.
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        name = origin.template_name or origin.name
+        if name.endswith('.html') and not name.endswith(PLAIN_TEXT_SUFFIXES):
+            return minify(contents)
+        return contents
+
+
+class FilesystemLoader(MinifyMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,153 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+from core import metrics, surrogate
+
+lookup_requests = metrics.REGISTRY.counter(
+    'yatube_lookup_cache_total',
+    'Two-tier lookup cache requests by lookup, tier and result.',
+    ('lookup', 'tier', 'result'),
+)
+
+
+class LRU:
+    """Ограниченный словарь в памяти процесса с коротким сроком жизни."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class TwoTierLookup:
+    """Поиск объекта по уникальному полю: память процесса, кеш, БД.
+
+    Сохранение и удаление объекта сбрасывают обе записи в этом
+    процессе и в общем кеше; в памяти других процессов устаревшая
+    запись живёт не дольше LOOKUP_CACHE_LOCAL_TTL секунд. Кроме ключа
+    по значению в кеше хранится pk -> значение, чтобы при смене slug
+    сбросить и запись по старому.
+
+    Записи общего кеша помечены суррогатным ключом по pk объекта: сброс,
+    пришедший между чтением из БД и записью в кеш, не даст сохранить
+    прочитанный до него объект, даже если при этом сменился slug.
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.name = f'{model._meta.model_name}.{field}'
+        self._local = None
+        post_save.connect(self.invalidate, sender=model, weak=False)
+        post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    @property
+    def local(self):
+        if self._local is None:
+            self._local = LRU(
+                settings.LOOKUP_CACHE_LOCAL_SIZE,
+                settings.LOOKUP_CACHE_LOCAL_TTL,
+            )
+        return self._local
+
+    def value_key(self, value):
+        return f'lookup:{self.name}:{value}'
+
+    def pk_key(self, pk):
+        return f'lookup:{self.name}:pk:{pk}'
+
+    def surrogate_key(self, pk):
+        return f'lookup-{self.name}-{pk}'
+
+    def get(self, value):
+        """Объект по значению поля или model.DoesNotExist."""
+        if not settings.LOOKUP_CACHE_ENABLED:
+            return self.model._default_manager.get(**{self.field: value})
+        key = self.value_key(value)
+        obj = self.local.get(key)
+        lookup_requests.inc(
+            lookup=self.name, tier='local',
+            result='miss' if obj is None else 'hit',
+        )
+        if obj is None:
+            obj = surrogate.fetch(key)
+            lookup_requests.inc(
+                lookup=self.name, tier='shared',
+                result='miss' if obj is None else 'hit',
+            )
+            stored = True
+            if obj is None:
+                started = surrogate.start()
+                obj = self.model._default_manager.get(**{self.field: value})
+                cache.set(
+                    self.pk_key(obj.pk), value, settings.LOOKUP_CACHE_TIMEOUT
+                )
+                stored = surrogate.store(
+                    key, obj, [self.surrogate_key(obj.pk)],
+                    settings.LOOKUP_CACHE_TIMEOUT, started,
+                )
+            if stored:
+                self.local.set(key, obj)
+        # Объект из памяти общий для потоков: каждому вызову — своя
+        # копия вместе с _state и кешем связанных объектов.
+        return copy.deepcopy(obj)
+
+    def get_or_404(self, value):
+        try:
+            return self.get(value)
+        except self.model.DoesNotExist:
+            raise Http404(f'{self.model._meta.object_name} не найден')
+
+    def invalidate(self, sender, instance, **kwargs):
+        if not settings.LOOKUP_CACHE_ENABLED:
+            return
+        values = {getattr(instance, self.field)}
+        previous = cache.get(self.pk_key(instance.pk))
+        if previous is not None:
+            values.add(previous)
+        surrogate.purge(self.surrogate_key(instance.pk))
+        for value in values:
+            self.local.delete(self.value_key(value))
+        cache.delete_many([
+            *(self.value_key(value) for value in values),
+            self.pk_key(instance.pk),
+        ])
+
+    def clear(self):
+        """Очищает память процесса (общий кеш чистится cache.clear())."""
+        self.local.clear()
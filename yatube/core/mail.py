@@ -0,0 +1,185 @@
+import copy
+import os
+import pickle
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from core import metrics
+
+mail_total = metrics.REGISTRY.counter(
+    'yatube_mail_total',
+    'Spooled email messages by delivery outcome.',
+    ('outcome',),
+)
+
+# Подкаталоги спула, как в maildir: письмо пишется в tmp и атомарно
+# переносится в new; отправитель забирает его переименованием в sending.
+SUBDIRS = ('tmp', 'new', 'sending', 'failed')
+
+
+def spool_path(*parts):
+    return os.path.join(settings.EMAIL_SPOOL_DIR, *parts)
+
+
+def file_name(not_before, attempts, ident):
+    """Имя файла хранит время следующей попытки (мс) и их число.
+
+    Миллисекунды отбрасываются, а не округляются: иначе только что
+    записанное письмо могло бы оказаться ещё не готовым к отправке.
+    """
+    return f'{int(not_before * 1000):013d}-{attempts}-{ident}.pickle'
+
+
+def parse_name(name):
+    not_before, attempts, ident = name[:-len('.pickle')].split('-', 2)
+    return int(not_before) / 1000, int(attempts), ident
+
+
+def ensure_dirs():
+    for subdir in SUBDIRS:
+        os.makedirs(spool_path(subdir), exist_ok=True)
+
+
+def spool(message):
+    """Сохраняет письмо в спул; файл появляется в new целиком или никак."""
+    message = copy.copy(message)
+    message.connection = None
+    name = file_name(time.time(), 0, uuid.uuid4().hex)
+    temporary = spool_path('tmp', name)
+    with open(temporary, 'wb') as output:
+        pickle.dump(message, output, pickle.HIGHEST_PROTOCOL)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, spool_path('new', name))
+    return name
+
+
+def retry_delay(attempts):
+    return min(
+        settings.EMAIL_SPOOL_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.EMAIL_SPOOL_RETRY_MAX_DELAY,
+    )
+
+
+def due(now=None):
+    """Имена писем в new, время попытки которых наступило, по порядку."""
+    now = time.time() if now is None else now
+    names = sorted(
+        name for name in os.listdir(spool_path('new'))
+        if name.endswith('.pickle')
+    )
+    return [name for name in names if parse_name(name)[0] <= now]
+
+
+def next_attempt():
+    """Время ближайшей попытки среди ожидающих писем или None."""
+    names = sorted(
+        name for name in os.listdir(spool_path('new'))
+        if name.endswith('.pickle')
+    )
+    return parse_name(names[0])[0] if names else None
+
+
+def claim(names):
+    """Переносит письма в sending; чужие (уже забранные) пропускает."""
+    claimed = []
+    for name in names:
+        target = spool_path('sending', name)
+        try:
+            os.rename(spool_path('new', name), target)
+        except FileNotFoundError:
+            continue
+        os.utime(target)
+        claimed.append(name)
+    return claimed
+
+
+def release_stale(now=None):
+    """Возвращает в new письма отправителя, упавшего посреди пачки."""
+    now = time.time() if now is None else now
+    released = 0
+    for name in os.listdir(spool_path('sending')):
+        path = spool_path('sending', name)
+        try:
+            stale = (
+                os.path.getmtime(path)
+                < now - settings.EMAIL_SPOOL_LOCK_TIMEOUT
+            )
+            if stale:
+                os.rename(path, spool_path('new', name))
+                released += 1
+        except FileNotFoundError:
+            continue
+    return released
+
+
+def reschedule(name, error):
+    """Назначает повтор с задержкой или откладывает письмо в failed."""
+    _, attempts, ident = parse_name(name)
+    attempts += 1
+    source = spool_path('sending', name)
+    if attempts >= settings.EMAIL_SPOOL_MAX_ATTEMPTS:
+        with open(spool_path('failed', f'{ident}.error'), 'w') as output:
+            output.write(f'{error!r}\n')
+        os.rename(source, spool_path('failed', name))
+        return 'failed'
+    os.rename(source, spool_path('new', file_name(
+        time.time() + retry_delay(attempts), attempts, ident
+    )))
+    return 'retry'
+
+
+def send_batch(names):
+    """Отправляет пачку писем через одно соединение.
+
+    Если соединение не открылось, повтор назначается всей пачке;
+    ошибка отдельного письма откладывает только его.
+    """
+    stats = {}
+    connection = get_connection(
+        settings.EMAIL_SPOOL_BACKEND, fail_silently=False
+    )
+    try:
+        connection.open()
+    except Exception as error:
+        for name in names:
+            outcome = reschedule(name, error)
+            stats[outcome] = stats.get(outcome, 0) + 1
+        return stats
+    try:
+        for name in names:
+            path = spool_path('sending', name)
+            try:
+                with open(path, 'rb') as source:
+                    message = pickle.load(source)
+                connection.send_messages([message])
+            except Exception as error:
+                outcome = reschedule(name, error)
+            else:
+                os.remove(path)
+                outcome = 'sent'
+            stats[outcome] = stats.get(outcome, 0) + 1
+    finally:
+        connection.close()
+    return stats
+
+
+def deliver(batch_size=None):
+    """Отправляет все готовые письма пачками; возвращает счётчики исходов."""
+    batch_size = batch_size or settings.EMAIL_SPOOL_BATCH_SIZE
+    ensure_dirs()
+    release_stale()
+    totals = {}
+    while True:
+        candidates = due()[:batch_size]
+        if not candidates:
+            return totals
+        names = claim(candidates)
+        if not names:
+            continue
+        for outcome, count in send_batch(names).items():
+            totals[outcome] = totals.get(outcome, 0) + count
+            mail_total.inc(count, outcome=outcome)
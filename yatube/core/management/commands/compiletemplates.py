@@ -0,0 +1,92 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Engine
+
+from core.warmup import compile_templates, django_backends
+
+FILESYSTEM_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+MINIFY_LOADERS = [
+    'core.loaders.FilesystemLoader',
+    'core.loaders.AppDirectoriesLoader',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны проекта и приложений. Завершается '
+        'с ошибкой, если хотя бы один шаблон не компилируется, '
+        'поэтому подходит как шаг сборки перед выкладкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--measure', type=int, metavar='N', default=0,
+            help=(
+                'Сравнить время N рендерингов страниц posts/ без кеша '
+                'шаблонов и с cached.Loader, а также размер страниц '
+                'до и после минификации.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        errors = compile_templates()
+        for name, exc in sorted(errors.items()):
+            self.stderr.write(f'{name}: {exc}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблоны скомпилированы за {perf_counter() - start:.2f} с'
+        ))
+        if options['measure']:
+            self.measure(options['measure'])
+
+    def measure(self, iterations):
+        engine = django_backends()[0].engine
+        common = {
+            'dirs': engine.dirs,
+            'libraries': engine.libraries,
+            'builtins': engine.builtins,
+        }
+        plain = Engine(loaders=FILESYSTEM_LOADERS, **common)
+        cached = Engine(
+            loaders=[('django.template.loaders.cached.Loader',
+                      FILESYSTEM_LOADERS)],
+            **common
+        )
+        minified = Engine(
+            loaders=[('django.template.loaders.cached.Loader',
+                      MINIFY_LOADERS)],
+            **common
+        )
+        names = [
+            'posts/index.html', 'posts/group_list.html',
+            'posts/profile.html', 'posts/follow.html',
+        ]
+        self.stdout.write(
+            f'{"шаблон":<24}{"без кеша, мс":>14}{"cached, мс":>12}'
+            f'{"байт":>8}{"минифицировано":>16}'
+        )
+        for name in names:
+            row = [self.render_time(candidate, name, iterations)
+                   for candidate in (plain, cached)]
+            sizes = [
+                len(candidate.get_template(name).render(Context()))
+                for candidate in (plain, minified)
+            ]
+            self.stdout.write(
+                f'{name:<24}{row[0] * 1000:>14.3f}{row[1] * 1000:>12.3f}'
+                f'{sizes[0]:>8}{sizes[1]:>16}'
+            )
+
+    @staticmethod
+    def render_time(engine, name, iterations):
+        engine.get_template(name).render(Context())
+        start = perf_counter()
+        for _ in range(iterations):
+            engine.get_template(name).render(Context())
+        return (perf_counter() - start) / iterations
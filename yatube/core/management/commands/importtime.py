@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+DEFAULT_HISTORY = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'benchmarks', 'importtime.jsonl'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время импорта модуля (по умолчанию yatube.wsgi) '
+        'в чистом интерпретаторе через python -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='yatube.wsgi')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--warmup', action='store_true',
+            help='Включить прогрев YATUBE_WARMUP при импорте.'
+        )
+        parser.add_argument(
+            '--history', nargs='?', const=DEFAULT_HISTORY,
+            help='Дописать результат в файл истории (JSON Lines).'
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+        ))
+        env['YATUBE_WARMUP'] = '1' if options['warmup'] else '0'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             f'import {options["module"]}'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        modules = []
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append({
+                    'name': name,
+                    'self_ms': int(self_us) / 1000,
+                    'cumulative_ms': int(cumulative_us) / 1000,
+                    'top_level': not indent,
+                })
+        total = sum(module['self_ms'] for module in modules)
+        by_cumulative = sorted(
+            modules, key=lambda module: module['cumulative_ms'], reverse=True
+        )[:options['top']]
+        by_self = sorted(
+            modules, key=lambda module: module['self_ms'], reverse=True
+        )[:options['top']]
+
+        self.stdout.write(
+            f'Импорт {options["module"]}: {total:.1f} мс, '
+            f'модулей: {len(modules)}'
+        )
+        self.print_table('По суммарному времени', by_cumulative)
+        self.print_table('По собственному времени', by_self)
+
+        if options['history']:
+            path = options['history']
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as history:
+                history.write(json.dumps({
+                    'time': datetime.now(timezone.utc).isoformat(),
+                    'module': options['module'],
+                    'warmup': options['warmup'],
+                    'total_ms': round(total, 1),
+                    'modules': len(modules),
+                    'top': [
+                        [module['name'], module['cumulative_ms']]
+                        for module in by_cumulative
+                    ],
+                }) + '\n')
+
+    def print_table(self, title, modules):
+        self.stdout.write(f'\n{title}:')
+        self.stdout.write(f'{"собств., мс":>12}{"сумм., мс":>12}  модуль')
+        for module in modules:
+            self.stdout.write(
+                f'{module["self_ms"]:>12.1f}{module["cumulative_ms"]:>12.1f}'
+                f'  {module["name"]}'
+            )
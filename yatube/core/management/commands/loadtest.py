@@ -0,0 +1,288 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import resolve_url
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler,
+)
+
+from posts.models import Post
+
+SCENARIOS = (
+    'index', 'follow_index', 'post_detail', 'add_comment', 'post_create',
+)
+
+DEFAULT_MIX = (
+    'index=50,follow_index=15,post_detail=25,add_comment=5,post_create=5'
+)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Worker(threading.Thread):
+    """Пользователь в замкнутом цикле: запрос, ответ, следующий запрос."""
+
+    def __init__(self, number, options, post_ids, stop, samples):
+        super().__init__(daemon=True)
+        self.base = options['url'].rstrip('/')
+        self.username = f'{options["user_prefix"]}{number}'
+        self.password = options['password']
+        self.post_ids = post_ids
+        self.rng = random.Random(number)
+        self.scenarios, self.weights = zip(*options['mix'].items())
+        self.stop = stop
+        self.samples = samples
+        self.anonymous = requests.Session()
+        self.session = requests.Session()
+        self.logged_in = False
+        self.login_path = resolve_url(settings.LOGIN_URL)
+
+    def csrf_post(self, path, data):
+        token = self.session.cookies.get('csrftoken')
+        if token is None:
+            self.session.get(f'{self.base}/auth/login/')
+            token = self.session.cookies.get('csrftoken')
+        return self.session.post(
+            f'{self.base}{path}',
+            data={'csrfmiddlewaretoken': token, **data},
+            headers={'Referer': f'{self.base}{path}'},
+            allow_redirects=False,
+        )
+
+    def login(self):
+        response = self.csrf_post('/auth/login/', {
+            'username': self.username, 'password': self.password,
+        })
+        self.logged_in = response.status_code == 302
+        return response
+
+    def index(self):
+        return self.anonymous.get(f'{self.base}/')
+
+    def follow_index(self):
+        return self.session.get(f'{self.base}/follow/')
+
+    def post_detail(self):
+        post_id = self.rng.choice(self.post_ids)
+        return self.anonymous.get(f'{self.base}/posts/{post_id}/')
+
+    def add_comment(self):
+        post_id = self.rng.choice(self.post_ids)
+        return self.csrf_post(
+            f'/posts/{post_id}/comment/', {'text': 'Нагрузочный тест'}
+        )
+
+    def post_create(self):
+        return self.csrf_post('/create/', {'text': 'Нагрузочный тест'})
+
+    def succeeded(self, response):
+        """Ответ без ошибки и не переадресация на страницу входа.
+
+        Сценарии на запись не следуют переадресациям, а follow_index
+        следует: страница входа в ответе значит, что сессии нет.
+        """
+        if response.status_code >= 400:
+            return False
+        paths = [urlsplit(response.url).path]
+        if response.is_redirect:
+            paths.append(urlsplit(response.headers['Location']).path)
+        return not any(path == self.login_path for path in paths)
+
+    def run(self):
+        while not self.stop.is_set():
+            name = self.rng.choices(self.scenarios, self.weights)[0]
+            ok = True
+            start = time.perf_counter()
+            try:
+                # Вход не входит во время сценария.
+                if not self.logged_in and name != 'index':
+                    self.login()
+                    ok = self.logged_in
+                start = time.perf_counter()
+                if ok:
+                    ok = self.succeeded(getattr(self, name)())
+            except requests.RequestException:
+                ok = False
+            self.samples.append(
+                (time.monotonic(), name, time.perf_counter() - start, ok)
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест в замкнутом цикле: поднимает yatube.wsgi '
+        'локально (или использует --url) и гоняет смесь сценариев '
+        'заданным числом параллельных пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Адрес уже запущенного сервера.')
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--interval', type=float, default=5)
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help='Веса сценариев: index=50,follow_index=15,...'
+        )
+        parser.add_argument(
+            '--user-prefix', default='seed',
+            help='Пользователи из manage.py seed: seed0, seed1, ...'
+        )
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        options['mix'] = self.parse_mix(options['mix'])
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:10000])
+        if not post_ids:
+            raise CommandError('Нет постов: заполните базу командой seed.')
+        server = None
+        if not options['url']:
+            server = self.start_server(options['port'])
+            host, port = server.server_address[:2]
+            options['url'] = f'http://{host}:{port}'
+        stop = threading.Event()
+        samples = []
+        workers = [
+            Worker(number, options, post_ids, stop, samples)
+            for number in range(options['concurrency'])
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        try:
+            timeline = self.watch(samples, started, options)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        summary = self.summarize(samples, time.monotonic() - started)
+        self.print_summary(summary)
+        if options['output']:
+            self.save(options, summary, timeline)
+
+    @staticmethod
+    def parse_mix(value):
+        mix = {}
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            if name.strip() not in SCENARIOS:
+                raise CommandError(f'Неизвестный сценарий: {name}')
+            try:
+                mix[name.strip()] = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'Неверный вес сценария: {item}')
+            if mix[name.strip()] < 0:
+                raise CommandError(f'Неверный вес сценария: {item}')
+        if not sum(mix.values()):
+            raise CommandError('Сумма весов сценариев равна нулю')
+        return mix
+
+    @staticmethod
+    def start_server(port):
+        from yatube.wsgi import application
+
+        server = ThreadedWSGIServer(('127.0.0.1', port), QuietHandler)
+        server.set_app(application)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def watch(self, samples, started, options):
+        timeline = []
+        seen = 0
+        deadline = started + options['duration']
+        window_start = started
+        while time.monotonic() < deadline:
+            time.sleep(max(
+                0, min(options['interval'], deadline - time.monotonic())
+            ))
+            now = time.monotonic()
+            window = samples[seen:]
+            seen += len(window)
+            # Последнее окно короче интервала.
+            length = max(now - window_start, 1e-9)
+            window_start = now
+            latencies = [sample[2] for sample in window]
+            errors = sum(1 for sample in window if not sample[3])
+            point = {
+                'elapsed': round(now - started, 1),
+                'rps': len(window) / length,
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'error_rate': errors / len(window) if window else 0.0,
+            }
+            timeline.append(point)
+            self.stdout.write(
+                f'{point["elapsed"]:>7} с  {point["rps"]:>8.1f} rps  '
+                f'p95 {point["p95"] * 1000:>8.1f} мс  '
+                f'ошибок {point["error_rate"]:.1%}'
+            )
+        return timeline
+
+    @staticmethod
+    def summarize(samples, elapsed):
+        by_scenario = defaultdict(list)
+        for _, name, latency, ok in samples:
+            by_scenario[name].append((latency, ok))
+        summary = {}
+        for name, rows in sorted(by_scenario.items()):
+            latencies = [latency for latency, _ in rows]
+            summary[name] = {
+                'requests': len(rows),
+                'rps': len(rows) / elapsed,
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'error_rate': sum(1 for _, ok in rows if not ok) / len(rows),
+            }
+        return summary
+
+    def print_summary(self, summary):
+        self.stdout.write(
+            f'{"сценарий":<14}{"запросов":>10}{"rps":>9}{"p50, мс":>10}'
+            f'{"p95, мс":>10}{"p99, мс":>10}{"ошибки":>9}'
+        )
+        for name, row in summary.items():
+            self.stdout.write(
+                f'{name:<14}{row["requests"]:>10}{row["rps"]:>9.1f}'
+                f'{row["p50"] * 1000:>10.1f}{row["p95"] * 1000:>10.1f}'
+                f'{row["p99"] * 1000:>10.1f}{row["error_rate"]:>9.1%}'
+            )
+
+    @staticmethod
+    def save(options, summary, timeline):
+        path = options['output']
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump({
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'mix': options['mix'],
+                'summary': summary,
+                'timeline': timeline,
+            }, output, indent=2, ensure_ascii=False)
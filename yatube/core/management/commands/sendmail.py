@@ -0,0 +1,29 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from core.mail import deliver
+
+
+class Command(BaseCommand):
+    help = (
+        'Доставляет письма из спула EMAIL_SPOOL_DIR пачками через одно '
+        'соединение EMAIL_SPOOL_BACKEND. Неотправленные письма '
+        'повторяются с нарастающей задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Писем на одно соединение.'
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        totals = deliver(options['batch_size'])
+        summary = ', '.join(
+            f'{outcome}: {count}' for outcome, count in sorted(totals.items())
+        ) or 'нет писем'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} за {perf_counter() - start:.1f} с'
+        ))
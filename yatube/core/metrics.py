@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+PROCESSES_KEY = 'metrics:processes'
+PROCESS_KEY = 'metrics:process:{}'
+
+
+class Counter:
+    """Счётчик с метками, накапливаемый внутри процесса."""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {key: value for key, value in self._values.items()}
+
+    @staticmethod
+    def merge(left, right):
+        return left + right
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, как в Prometheus."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: [list(counts), total, count]
+                for key, (counts, total, count) in self._values.items()
+            }
+
+    @staticmethod
+    def merge(left, right):
+        return [
+            [a + b for a, b in zip(left[0], right[0])],
+            left[1] + right[1],
+            left[2] + right[2],
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return self.register(
+            Histogram(name, documentation, labelnames, **kwargs)
+        )
+
+    def snapshot(self):
+        return {
+            name: metric.snapshot()
+            for name, metric in self._metrics.items()
+        }
+
+    def maybe_flush(self):
+        """Периодически публикует снимок процесса в общий кеш.
+
+        Так /metrics в любом воркере видит сумму по всем процессам,
+        если кеш общий (memcached, redis и т.п.).
+        """
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+        now = time.monotonic()
+        if now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush()
+
+    def flush(self):
+        pid = os.getpid()
+        ttl = getattr(settings, 'METRICS_PROCESS_TTL', 600)
+        cache.set(PROCESS_KEY.format(pid), self.snapshot(), ttl)
+        processes = set(cache.get(PROCESSES_KEY) or ())
+        if pid not in processes:
+            processes.add(pid)
+            cache.set(PROCESSES_KEY, processes, None)
+
+    def collect(self):
+        """Возвращает снимок, просуммированный по всем воркерам."""
+        self.flush()
+        processes = cache.get(PROCESSES_KEY) or ()
+        keys = {PROCESS_KEY.format(pid): pid for pid in processes}
+        snapshots = cache.get_many(keys)
+        alive = {keys[key] for key in snapshots}
+        if alive != set(processes):
+            cache.set(PROCESSES_KEY, alive, None)
+        merged = {}
+        for snapshot in snapshots.values():
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in values.items():
+                    if key in target:
+                        target[key] = metric.merge(target[key], value)
+                    else:
+                        target[key] = value
+        return merged
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+        merged = self.collect()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(merged.get(name, {}).items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(
+                        f'{name}{_format_labels(labels)} {value}'
+                    )
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                bounds = [repr(float(b)) for b in metric.buckets]
+                for bound, bucket in zip(bounds + ['+Inf'], counts):
+                    cumulative += bucket
+                    bucket_labels = _format_labels(labels + [('le', bound)])
+                    lines.append(
+                        f'{name}_bucket{bucket_labels} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+                lines.append(
+                    f'{name}_count{_format_labels(labels)} {count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+REGISTRY = Registry()
+
+request_duration = REGISTRY.histogram(
+    'yatube_request_duration_seconds',
+    'Wall time of a request by view.',
+    ('view',),
+)
+db_queries = REGISTRY.histogram(
+    'yatube_db_queries',
+    'Number of DB queries per request by view.',
+    ('view',),
+    buckets=COUNT_BUCKETS,
+)
+db_duration = REGISTRY.histogram(
+    'yatube_db_duration_seconds',
+    'Time spent in DB queries per request by view.',
+    ('view',),
+)
+template_duration = REGISTRY.histogram(
+    'yatube_template_render_seconds',
+    'Time spent rendering templates per request by view.',
+    ('view',),
+)
+response_size = REGISTRY.histogram(
+    'yatube_response_size_bytes',
+    'Response body size by view.',
+    ('view',),
+    buckets=SIZE_BUCKETS,
+)
+cache_requests = REGISTRY.counter(
+    'yatube_cache_requests_total',
+    'Cache lookups by view and result.',
+    ('view', 'result'),
+)
+
+_local = threading.local()
+
+
+class RequestStats:
+    __slots__ = (
+        'queries', 'db_time', 'template_time', 'template_depth',
+        'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def start_request(stats=None):
+    """Делает stats текущими для потока; по умолчанию — новые."""
+    if stats is None:
+        stats = RequestStats()
+    _local.stats = stats
+    return stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def record_cache_lookup(hit):
+    stats = current_stats()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
@@ -0,0 +1,231 @@
+import hashlib
+import re
+import zlib
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from core import metrics
+
+from .metrics import UNRESOLVED
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'application/rss+xml', 'application/atom+xml',
+    'image/svg+xml',
+)
+ACCEPT_ENCODING_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+compression_bytes = metrics.REGISTRY.counter(
+    'yatube_compression_bytes_total',
+    'Response bytes before and after compression by view and coding.',
+    ('view', 'coding', 'stage'),
+)
+compression_duration = metrics.REGISTRY.histogram(
+    'yatube_compression_seconds',
+    'Time spent compressing a response by view and coding.',
+    ('view', 'coding'),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+compression_cache = metrics.REGISTRY.counter(
+    'yatube_compression_cache_total',
+    'Lookups of already compressed page variants by result.',
+    ('coding', 'result'),
+)
+
+
+class GzipStream:
+    coding = 'gzip'
+
+    def __init__(self):
+        # wbits=31 — формат gzip с заголовком и контрольной суммой.
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    coding = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def available_codings():
+    """Кодировки в порядке предпочтения сервера."""
+    codings = {'gzip': GzipStream}
+    if brotli is not None:
+        codings = {'br': BrotliStream, **codings}
+    return codings
+
+
+def negotiate(accept_encoding):
+    """Выбирает кодировку по Accept-Encoding с учётом q-значений.
+
+    При равных весах побеждает предпочтение сервера: brotli, затем gzip.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match or not match.group(1):
+            continue
+        try:
+            weight = float(match.group(2) or 1)
+        except ValueError:
+            continue
+        weights[match.group(1).lower()] = weight
+    best, best_weight = None, 0
+    for coding in available_codings():
+        weight = weights.get(coding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(coding, data):
+    stream = available_codings()[coding]()
+    return stream.compress(data) + stream.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы в brotli или gzip.
+
+    Обычные ответы сжимаются целиком. Сжатые варианты общих для
+    анонимов страниц (с заголовком Surrogate-Key) хранятся в кеше
+    по хешу содержимого, поэтому повторное попадание не тратит
+    процессор на сжатие. Потоковые ответы сжимаются по частям
+    со сбросом буфера после каждой части, чтобы браузер получал
+    начало страницы, не дожидаясь конца.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not settings.COMPRESSION_ENABLED:
+            return response
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+        view = self.view_name(request)
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, coding, view
+            )
+            del response['Content-Length']
+        else:
+            response.content = self.compress_content(
+                request, response, coding, view
+            )
+            response['Content-Length'] = str(len(response.content))
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^(W/)?"', 'W/"', response['ETag'])
+        response['Content-Encoding'] = coding
+        return response
+
+    @staticmethod
+    def compressible(response):
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        return response.streaming or (
+            len(response.content) >= settings.COMPRESSION_MIN_LENGTH
+        )
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match is not None else UNRESOLVED
+
+    @staticmethod
+    def shared(request, response):
+        """Ответ одинаков для всех анонимов: его сжатие стоит кешировать."""
+        user = getattr(request, 'user', None)
+        return (
+            response.has_header('Surrogate-Key')
+            and not (user is not None and user.is_authenticated)
+        )
+
+    def compress_content(self, request, response, coding, view):
+        content = response.content
+        shared = self.shared(request, response)
+        if shared:
+            key = 'compressed:{}:{}'.format(
+                coding, hashlib.md5(content).hexdigest()
+            )
+            compressed = cache.get(key)
+            compression_cache.inc(
+                coding=coding, result='miss' if compressed is None else 'hit'
+            )
+            if compressed is not None:
+                self.count(view, coding, len(content), len(compressed))
+                return compressed
+        start = perf_counter()
+        compressed = compress(coding, content)
+        compression_duration.observe(
+            perf_counter() - start, view=view, coding=coding
+        )
+        self.count(view, coding, len(content), len(compressed))
+        if shared:
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
+
+    def compress_stream(self, chunks, coding, view):
+        stream = available_codings()[coding]()
+        original = compressed = 0
+        elapsed = 0.0
+        for chunk in chunks:
+            start = perf_counter()
+            data = stream.compress(chunk) + stream.flush()
+            elapsed += perf_counter() - start
+            original += len(chunk)
+            compressed += len(data)
+            if data:
+                yield data
+        data = stream.finish()
+        compressed += len(data)
+        compression_duration.observe(elapsed, view=view, coding=coding)
+        self.count(view, coding, original, compressed)
+        yield data
+
+    @staticmethod
+    def count(view, coding, original, compressed):
+        compression_bytes.inc(
+            original, view=view, coding=coding, stage='original'
+        )
+        compression_bytes.inc(
+            compressed, view=view, coding=coding, stage='compressed'
+        )
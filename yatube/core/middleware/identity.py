@@ -0,0 +1,31 @@
+from django.conf import settings
+
+from core import identity
+
+
+class IdentityMapMiddleware:
+    """Включает карту идентичности на время обработки запроса.
+
+    Любой запрос к БД, кроме чтения, очищает карту, так что после
+    записи объекты и выборки загружаются заново. Потоковый ответ
+    рендерится с той же картой, пока отдаётся его содержимое.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.IDENTITY_MAP_ENABLED:
+            return self.get_response(request)
+        with identity.activate() as identity_map:
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, identity_map
+            )
+        return response
+
+    @staticmethod
+    def stream(content, identity_map):
+        with identity.activate(identity_map):
+            yield from content
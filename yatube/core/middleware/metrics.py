@@ -0,0 +1,88 @@
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.db import connections
+
+from core import metrics
+
+UNRESOLVED = '<unresolved>'
+
+
+class MetricsMiddleware:
+    """Собирает метрики запроса в разрезе имени представления.
+
+    Время ответа, число и время запросов к БД, время рендеринга
+    шаблонов, попадания в кеш и размер ответа пишутся
+    в гистограммы из core.metrics. Потоковый ответ учитывается
+    целиком, когда отдан последний кусок.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        start = perf_counter()
+        try:
+            with self.recording(stats):
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, stats, start
+            )
+        else:
+            self.observe(request, response, stats, perf_counter() - start)
+        return response
+
+    def stream(self, content, request, response, stats, start):
+        """Досчитывает запросы и рендеринг, идущие во время отдачи."""
+        metrics.start_request(stats)
+        try:
+            with self.recording(stats):
+                yield from content
+        finally:
+            metrics.finish_request()
+            self.observe(request, response, stats, perf_counter() - start)
+
+    @classmethod
+    @contextmanager
+    def recording(cls, stats):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(cls._timed(stats))
+                )
+            yield
+
+    @staticmethod
+    def _timed(stats):
+        def wrapper(execute, sql, params, many, context):
+            start = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.queries += 1
+                stats.db_time += perf_counter() - start
+        return wrapper
+
+    @staticmethod
+    def observe(request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else UNRESOLVED
+        metrics.request_duration.observe(duration, view=view)
+        metrics.db_queries.observe(stats.queries, view=view)
+        metrics.db_duration.observe(stats.db_time, view=view)
+        metrics.template_duration.observe(stats.template_time, view=view)
+        if stats.cache_hits:
+            metrics.cache_requests.inc(
+                stats.cache_hits, view=view, result='hit'
+            )
+        if stats.cache_misses:
+            metrics.cache_requests.inc(
+                stats.cache_misses, view=view, result='miss'
+            )
+        if not response.streaming:
+            metrics.response_size.observe(len(response.content), view=view)
+        metrics.REGISTRY.maybe_flush()
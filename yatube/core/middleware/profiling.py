@@ -0,0 +1,136 @@
+import io
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import render
+
+PARAM = '_profile'
+FORMAT_PARAM = '_profile_format'
+SORT_PARAM = '_profile_sort'
+DEFAULT_SORT = 'cumulative'
+QUOTA_KEY = 'profiling:quota:{}'
+
+
+class ProfilingMiddleware:
+    """Профилирование отдельного запроса по ?_profile=cpu|mem.
+
+    Доступно только персоналу, не чаще PROFILING_RATE запросов
+    за PROFILING_PERIOD секунд на пользователя и не больше одного
+    профилирования одновременно в процессе. Без параметра
+    middleware ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.modes = {
+            'cpu': self.profile_cpu,
+            'mem': self.profile_memory,
+        }
+
+    def __call__(self, request):
+        if PARAM not in request.GET:
+            return self.get_response(request)
+        profiler = self.modes.get(request.GET[PARAM])
+        if profiler is None or not self.allowed(request):
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return profiler(request)
+        finally:
+            self.lock.release()
+
+    @staticmethod
+    def allowed(request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_staff:
+            return False
+        key = QUOTA_KEY.format(user.pk)
+        cache.add(key, 0, settings.PROFILING_PERIOD)
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            used = 1
+        return used <= settings.PROFILING_RATE
+
+    def _run(self, request):
+        start = perf_counter()
+        response = self.get_response(request)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response, perf_counter() - start
+
+    def profile_cpu(self, request):
+        import cProfile
+        import marshal
+        import pstats
+
+        profiler = cProfile.Profile()
+        response, duration = profiler.runcall(self._run, request)
+        stats = pstats.Stats(profiler)
+        if request.GET.get(FORMAT_PARAM) == 'download':
+            return self._download(
+                marshal.dumps(stats.stats), 'profile.prof',
+                'application/octet-stream'
+            )
+        stream = io.StringIO()
+        stats.stream = stream
+        # Значения pstats.SortKey и их синонимы вроде tottime;
+        # на неизвестный ключ sort_stats бросает KeyError.
+        sort = request.GET.get(SORT_PARAM)
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            sort = DEFAULT_SORT
+        stats.sort_stats(sort)
+        stats.print_stats(settings.PROFILING_LIMIT)
+        stats.print_callees(settings.PROFILING_LIMIT)
+        return self._report(
+            request, 'cpu', response, duration, stream.getvalue()
+        )
+
+    def profile_memory(self, request):
+        import tracemalloc
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        try:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            response, duration = self._run(request)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+        lines = [f'Пик памяти: {peak / 1024:.1f} KiB', '']
+        for stat in after.compare_to(before, 'traceback')[
+                :settings.PROFILING_LIMIT]:
+            lines.append(str(stat))
+            lines.extend(f'    {line}' for line in stat.traceback.format())
+        report = '\n'.join(lines)
+        if request.GET.get(FORMAT_PARAM) == 'download':
+            return self._download(
+                report.encode(), 'memory.txt', 'text/plain; charset=utf-8'
+            )
+        return self._report(request, 'mem', response, duration, report)
+
+    @staticmethod
+    def _download(content, filename, content_type):
+        response = HttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+
+    @staticmethod
+    def _report(request, mode, response, duration, report):
+        return render(request, 'core/profile.html', {
+            'mode': mode,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration': duration,
+            'report': report,
+        })
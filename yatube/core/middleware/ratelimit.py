@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.shortcuts import render
+
+from core.ratelimit import TokenBucket
+
+DEFAULT_METHODS = ('POST',)
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к представлениям на запись.
+
+    Лимиты задаются в RATELIMITS по имени представления: ёмкость
+    ведра и период его полного пополнения отдельно для пользователя
+    и для IP. При исчерпании — 429 с заголовком Retry-After.
+    За прокси адрес клиента берётся из RATELIMIT_CLIENT_IP_HEADER.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.buckets = {}
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATELIMIT_ENABLED:
+            return None
+        view = request.resolver_match.view_name
+        limits = settings.RATELIMITS.get(view)
+        if limits is None:
+            return None
+        if request.method not in limits.get('methods', DEFAULT_METHODS):
+            return None
+        retry_after = 0
+        for scope, ident in self.identities(request):
+            if scope not in limits:
+                continue
+            bucket = self.bucket(*limits[scope])
+            retry_after = bucket.consume(scope, ident, view)
+            if retry_after:
+                break
+        if not retry_after:
+            return None
+        response = render(
+            request, 'core/429.html', {'retry_after': retry_after},
+            status=429,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    @staticmethod
+    def identities(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            yield 'user', user.pk
+        yield 'ip', RateLimitMiddleware.client_ip(request)
+
+    @staticmethod
+    def client_ip(request):
+        """Адрес клиента из заголовка доверенного прокси или REMOTE_ADDR.
+
+        Начало X-Forwarded-For клиент может подделать, поэтому берётся
+        N-й адрес с конца (N — RATELIMIT_TRUSTED_PROXIES): его дописал
+        ближайший к клиенту доверенный прокси.
+        """
+        header = settings.RATELIMIT_CLIENT_IP_HEADER
+        if header:
+            chain = [
+                address.strip()
+                for address in request.META.get(header, '').split(',')
+                if address.strip()
+            ]
+            if chain:
+                depth = min(settings.RATELIMIT_TRUSTED_PROXIES, len(chain))
+                return chain[-depth]
+        return request.META.get('REMOTE_ADDR', '')
+
+    def bucket(self, capacity, period):
+        key = (capacity, period)
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(capacity, period)
+        return self.buckets[key]
@@ -0,0 +1,115 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core import surrogate
+
+SKIP_HEADERS = ('set-cookie',)
+
+
+class AnonymousResponseCacheMiddleware:
+    """Кеширует ответы анонимным пользователям целиком.
+
+    Кешируются только GET/HEAD с кодом 200 от представлений,
+    пометивших ответ суррогатными ключами. Ключ кеша — хост,
+    путь и строка запроса. Ответ получает заголовок Surrogate-Key,
+    чтобы фронтовой прокси мог сбрасывать кеш по тем же ключам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            response = self.get_response(request)
+            self.add_header(request, response)
+            return response
+        key = self.cache_key(request)
+        cached = surrogate.fetch(key)
+        if cached is not None:
+            return self.build(request, cached)
+        started = surrogate.start()
+        response = self.get_response(request)
+        if self.cacheable_response(request, response):
+            if response.streaming:
+                response.streaming_content = self.store_streamed(
+                    response.streaming_content, key, request, response,
+                    started,
+                )
+            else:
+                self.store(key, request, response, response.content, started)
+        self.add_header(request, response)
+        return response
+
+    def store_streamed(self, content, key, request, response, started):
+        """Отдаёт поток и кладёт ответ в кеш, если он дошёл до конца."""
+        chunks = []
+        for chunk in content:
+            chunks.append(chunk)
+            yield chunk
+        self.store(key, request, response, b''.join(chunks), started)
+
+    def store(self, key, request, response, content, started):
+        surrogate.store(
+            key, self.freeze(request, response, content),
+            surrogate.surrogate_keys(request),
+            settings.RESPONSE_CACHE_TIMEOUT, started,
+        )
+
+    @staticmethod
+    def cacheable_request(request):
+        return (
+            settings.RESPONSE_CACHE_ENABLED
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+        )
+
+    @staticmethod
+    def cacheable_response(request, response):
+        return (
+            response.status_code == 200
+            and getattr(request, 'surrogate_keys', None)
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    @staticmethod
+    def cache_key(request):
+        url = request.build_absolute_uri()
+        return 'response_cache:' + hashlib.md5(url.encode()).hexdigest()
+
+    @staticmethod
+    def freeze(request, response, content):
+        headers = [
+            (name, value) for name, value in response.items()
+            if name.lower() not in SKIP_HEADERS
+        ]
+        keys = ' '.join(surrogate.surrogate_keys(request))
+        if keys:
+            headers.append(('Surrogate-Key', keys))
+        return content, response.status_code, headers
+
+    @staticmethod
+    def build(request, cached):
+        """Ответ из кеша; на условный запрос — 304 по ETag/Last-Modified."""
+        content, status, headers = cached
+        response = HttpResponse(content, status=status)
+        for name, value in headers:
+            response[name] = value
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')
+            ),
+            response=response,
+        )
+
+    @staticmethod
+    def add_header(request, response):
+        keys = surrogate.surrogate_keys(request)
+        if keys and not response.has_header('Surrogate-Key'):
+            response['Surrogate-Key'] = ' '.join(keys)
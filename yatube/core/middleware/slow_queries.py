@@ -0,0 +1,53 @@
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from core import slow_queries
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал запросы к БД дольше SLOW_QUERY_THRESHOLD секунд."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = settings.SLOW_QUERY_THRESHOLD
+
+    def __call__(self, request):
+        with self.recording(request):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request
+            )
+        return response
+
+    def stream(self, content, request):
+        """Запросы при рендеринге потокового ответа тоже в журнал."""
+        with self.recording(request):
+            yield from content
+
+    @contextmanager
+    def recording(self, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(self._recorder(request))
+                )
+            yield
+
+    def _recorder(self, request):
+        threshold = self.threshold
+
+        def wrapper(execute, sql, params, many, context):
+            start = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = perf_counter() - start
+                if duration >= threshold:
+                    slow_queries.record(
+                        sql, None if many else params, duration, request
+                    )
+        return wrapper
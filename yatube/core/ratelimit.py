@@ -0,0 +1,48 @@
+import math
+import time
+
+from django.core.cache import cache
+
+KEY = 'ratelimit:{}:{}:{}:{}'
+# Счётчики живут в окнах этой длины: ключ получает TTL, а в начале
+# окна ведро снова полное. Окно много длиннее периода пополнения,
+# поэтому на границе окна клиент выигрывает не больше одного ведра.
+WINDOW = 3600
+# Счётчик ведётся в тысячных долях токена, чтобы срезать излишек
+# пополнения целым incr без заметной ошибки округления.
+SCALE = 1000
+
+
+class TokenBucket:
+    """Ведро токенов поверх атомарных add/incr кеша.
+
+    Вместо остатка токенов хранится счётчик потраченных с начала
+    окна: доступно capacity + пополнение за прошедшее время минус
+    потраченное. Так каждое решение — один incr без чтения
+    и записи состояния, и конкурентные запросы не теряют токены.
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    def consume(self, scope, ident, view, now=None):
+        """Берёт токен; возвращает 0 или через сколько секунд повторить."""
+        now = time.time() if now is None else now
+        window = int(now // WINDOW)
+        key = KEY.format(view, scope, ident, window)
+        try:
+            spent = cache.incr(key, SCALE)
+        except ValueError:
+            cache.add(key, 0, WINDOW + 60)
+            spent = cache.incr(key, SCALE)
+        minted = self.capacity + (now - window * WINDOW) * self.rate
+        available = minted - spent / SCALE + 1
+        if available > self.capacity:
+            # Простой не копит токены сверх ёмкости ведра.
+            cache.incr(key, math.floor((available - self.capacity) * SCALE))
+            return 0
+        if available >= 1:
+            return 0
+        cache.decr(key, SCALE)
+        return math.ceil((1 - available) / self.rate)
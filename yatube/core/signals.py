@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends.auth import forget_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_saved_user(sender, instance, **kwargs):
+    # Смена пароля тоже сохраняет пользователя: закешированный хеш
+    # пароля иначе разлогинил бы все сессии.
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
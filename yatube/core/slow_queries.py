@@ -0,0 +1,101 @@
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_INSTRUMENTATION = (
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'middleware'),
+)
+
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler, который сам создаёт каталог для журнала."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def _is_project_file(filename):
+    filename = os.path.abspath(filename)
+    return (
+        filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in filename
+        and not filename.startswith(_INSTRUMENTATION)
+    )
+
+
+def _template_position(frame):
+    """Ищет ближайший узел шаблона, из которого выполняется запрос."""
+    from django.template.base import Node
+
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        # type(), а не isinstance(): isinstance у SimpleLazyObject
+        # (request.user) вычисляет объект и делает запрос к БД.
+        if issubclass(type(node), Node) and getattr(node, 'token', None):
+            origin = getattr(node, 'origin', None)
+            name = getattr(origin, 'template_name', None) or getattr(
+                origin, 'name', None
+            )
+            return name, node.token.lineno
+        frame = frame.f_back
+    return None, None
+
+
+def _params(params):
+    """Значения параметров — только при SLOW_QUERY_LOG_PARAMS, иначе типы."""
+    if isinstance(params, dict):
+        params = params.values()
+    if settings.SLOW_QUERY_LOG_PARAMS:
+        return [str(param) for param in params or ()]
+    return [type(param).__name__ for param in params or ()]
+
+
+def record(sql, params, duration, request=None):
+    frame = sys._getframe(1)
+    template, line = _template_position(frame)
+    stack = [
+        f'{entry.filename}:{entry.lineno} in {entry.name}'
+        for entry in traceback.extract_stack(frame)
+        if _is_project_file(entry.filename)
+    ]
+    match = getattr(request, 'resolver_match', None)
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'duration': round(duration, 6),
+        'sql': sql,
+        'params': _params(params),
+        'view': match.view_name if match is not None else None,
+        'path': request.path if request is not None else None,
+        'template': template,
+        'line': line,
+        'stack': stack,
+    }
+    logger.warning(json.dumps(entry, ensure_ascii=False))
+    return entry
+
+
+def recent(limit=100):
+    """Последние записи журнала, новые первыми."""
+    try:
+        with open(settings.SLOW_QUERY_LOG, encoding='utf-8') as log:
+            lines = deque(log, maxlen=limit)
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
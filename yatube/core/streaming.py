@@ -0,0 +1,238 @@
+import logging
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template import loader
+from django.template.backends.django import Template as BackendTemplate
+from django.template.base import TextNode, VariableDoesNotExist
+from django.template.context import make_context
+from django.template.defaulttags import ForNode, IfNode
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode,
+)
+
+from .metrics import current_stats
+
+logger = logging.getLogger('django.request')
+
+# Граница, на которой накопленный текст можно отдать клиенту.
+FLUSH = object()
+
+
+def stream_render(request, template_name, context=None, content_type=None,
+                  status=None):
+    """Аналог django.shortcuts.render, отдающий страницу по частям.
+
+    <head> и обвязка base.html уходят клиенту сразу, статьи ленты —
+    по мере рендеринга, поэтому браузер начинает грузить CSS
+    и картинки, не дожидаясь конца страницы. Кеши страниц
+    (shared_page_cache, AnonymousResponseCacheMiddleware) сохраняют
+    такой ответ, только если поток дошёл до конца.
+    """
+    if not settings.STREAMING_RENDER_ENABLED:
+        return render(request, template_name, context, content_type, status)
+    template = loader.get_template(template_name)
+    if not isinstance(template, BackendTemplate):
+        return render(request, template_name, context, content_type, status)
+    # Cookie с CSRF-токеном выставляется до начала потока: когда шаблон
+    # дойдёт до {% csrf_token %}, заголовки уже будут отправлены.
+    # Формы на потоковых страницах видят только вошедшие, а анонимный
+    # ответ без cookie остаётся пригодным для общего кеша.
+    if request.user.is_authenticated:
+        get_token(request)
+    chunks = buffered(iter_template(template, context, request))
+    return StreamingHttpResponse(
+        guarded(timed(chunks), request),
+        content_type=content_type, status=status,
+    )
+
+
+def timed(chunks):
+    """Время рендеринга кусков — в статистику запроса, как у render()."""
+    chunks = iter(chunks)
+    while True:
+        stats = current_stats()
+        if stats is not None:
+            stats.template_depth += 1
+        start = perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            if stats is not None:
+                stats.template_depth -= 1
+                if not stats.template_depth:
+                    stats.template_time += perf_counter() - start
+        yield chunk
+
+
+def guarded(chunks, request):
+    """Ошибка посреди потока: в журнал и got_request_exception.
+
+    Статус 200 к этому времени уже отправлен, поэтому исключение
+    пробрасывается дальше: сервер обрывает соединение, и клиент
+    видит неполный ответ, а не страницу, которая просто кончилась.
+    """
+    try:
+        yield from chunks
+    except Exception:
+        got_request_exception.send(sender=None, request=request)
+        logger.error(
+            'Ошибка при потоковом рендеринге: %s', request.path,
+            exc_info=sys.exc_info(),
+            extra={'status_code': 500, 'request': request},
+        )
+        raise
+
+
+def buffered(parts, min_size=None):
+    """Склеивает мелкие куски и отдаёт их на границах FLUSH."""
+    if min_size is None:
+        min_size = settings.STREAMING_RENDER_MIN_CHUNK
+    buffer = []
+    size = 0
+    for part in parts:
+        if part is FLUSH:
+            if size >= min_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+            continue
+        buffer.append(part)
+        size += len(part)
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_template(backend_template, context, request):
+    """Рендерит шаблон генератором, как Template.render в Django."""
+    template = backend_template.template
+    context = make_context(
+        context, request, autoescape=template.engine.autoescape
+    )
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from iter_nodelist(template.nodelist, context)
+
+
+def iter_nodelist(nodelist, context):
+    for node in nodelist:
+        handler = HANDLERS.get(type(node))
+        if handler is None:
+            yield node.render_annotated(context)
+        else:
+            yield from handler(node, context)
+
+
+def iter_extends(node, context):
+    """ExtendsNode.render: блоки потомка подставляются в родителя."""
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for child in parent.nodelist:
+        if not isinstance(child, TextNode):
+            if not isinstance(child, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from iter_nodelist(parent.nodelist, context)
+
+
+def iter_block(node, context):
+    """BlockNode.render с поддержкой {{ block.super }}."""
+    yield FLUSH
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from iter_nodelist(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from iter_nodelist(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def iter_for(node, context):
+    """ForNode.render, отдающий текст после каждой итерации."""
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        length = len(values)
+        if length < 1:
+            yield from iter_nodelist(node.nodelist_empty, context)
+            return
+        if node.is_reversed:
+            values = reversed(values)
+        unpack = len(node.loopvars) > 1
+        loop = context['forloop'] = {'parentloop': parentloop}
+        for index, item in enumerate(values):
+            loop['counter0'] = index
+            loop['counter'] = index + 1
+            loop['revcounter'] = length - index
+            loop['revcounter0'] = length - index - 1
+            loop['first'] = index == 0
+            loop['last'] = index == length - 1
+            bind_loopvars(node, context, item, unpack)
+            yield from iter_nodelist(node.nodelist_loop, context)
+            if unpack:
+                context.pop()
+            yield FLUSH
+
+
+def bind_loopvars(node, context, item, unpack):
+    if not unpack:
+        context[node.loopvars[0]] = item
+        return
+    try:
+        item_length = len(item)
+    except TypeError:
+        item_length = 1
+    if item_length != len(node.loopvars):
+        raise ValueError(
+            f'Need {len(node.loopvars)} values to unpack '
+            f'in for loop; got {item_length}. '
+        )
+    context.update(dict(zip(node.loopvars, item)))
+
+
+def iter_if(node, context):
+    for condition, nodelist in node.conditions_nodelists:
+        if condition is None:
+            match = True
+        else:
+            try:
+                match = condition.eval(context)
+            except VariableDoesNotExist:
+                match = None
+        if match:
+            yield from iter_nodelist(nodelist, context)
+            return
+
+
+HANDLERS = {
+    ExtendsNode: iter_extends,
+    BlockNode: iter_block,
+    ForNode: iter_for,
+    IfNode: iter_if,
+}
@@ -0,0 +1,70 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'surrogate:{}'
+
+
+def add_surrogate_keys(request, *keys):
+    """Помечает ответ на запрос суррогатными ключами (post-1, group-2...)."""
+    if not hasattr(request, 'surrogate_keys'):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(keys)
+
+
+def surrogate_keys(request):
+    return sorted(getattr(request, 'surrogate_keys', ()))
+
+
+def _versions(keys):
+    version_keys = [VERSION_KEY.format(key) for key in keys]
+    for version_key in version_keys:
+        # Ни разу не сброшенный ключ старше любого рендеринга.
+        cache.add(version_key, 0, None)
+    return cache.get_many(version_keys)
+
+
+def start():
+    """Момент начала рендеринга; передаётся в store()."""
+    return time.time()
+
+
+def store(cache_key, value, keys, timeout, started=None):
+    """Кладёт значение в кеш вместе с версиями его суррогатных ключей.
+
+    Ключи становятся известны только после рендеринга, поэтому версии
+    сверяются с моментом его начала: если ключ сбросили во время
+    рендеринга, значение могло прочитать старые данные и не кешируется.
+    Возвращает, сохранено ли значение.
+    """
+    versions = _versions(keys)
+    if started is not None and any(
+        version >= started for version in versions.values()
+    ):
+        return False
+    cache.set(cache_key, (value, versions), timeout)
+    return True
+
+
+def fetch(cache_key):
+    """Значение из кеша или None, если хотя бы один его ключ сброшен."""
+    entry = cache.get(cache_key)
+    if entry is None:
+        return None
+    value, versions = entry
+    if versions and cache.get_many(list(versions)) != versions:
+        cache.delete(cache_key)
+        return None
+    return value
+
+
+def purge(*keys):
+    """Сбрасывает все записи кеша, помеченные любым из ключей.
+
+    Версия ключа меняется на текущее время; записи с прежней
+    версией считаются устаревшими при следующем чтении.
+    """
+    now = time.time()
+    cache.set_many(
+        {VERSION_KEY.format(key): now for key in keys if key}, None
+    )
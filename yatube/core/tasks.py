@@ -0,0 +1,34 @@
+import datetime
+
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import task
+
+from .mail import deliver, next_attempt
+
+
+def schedule_send_mail(run_at=None):
+    """Ставит доставку спула, если она ещё не ждёт в очереди.
+
+    Ключ идемпотентности тут не подходит: задача с ним ставится
+    лишь однажды. Одна ожидающая задача доставит все письма, поэтому
+    остальные письма и повторы её только сдвигают раньше.
+    """
+    run_at = run_at or timezone.now()
+    pending = Job.objects.filter(task=send_mail.name, status=Job.QUEUED)
+    if pending.filter(run_at__gt=run_at).update(run_at=run_at):
+        return
+    if not pending.exists():
+        send_mail.enqueue(priority=5, run_at=run_at)
+
+
+@task()
+def send_mail():
+    """Доставляет спул писем и планирует себя на ближайший повтор."""
+    deliver()
+    not_before = next_attempt()
+    if not_before is not None:
+        schedule_send_mail(
+            datetime.datetime.fromtimestamp(not_before, timezone.utc)
+        )
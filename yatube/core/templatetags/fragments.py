@@ -0,0 +1,51 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core import surrogate
+
+register = template.Library()
+
+
+class GuardedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = make_template_fragment_key(
+            self.fragment_name,
+            [var.resolve(context) for var in self.vary_on],
+        )
+        value = surrogate.fetch(key)
+        if value is None:
+            started = surrogate.start()
+            value = self.nodelist.render(context)
+            surrogate.store(
+                key, value, [key], self.timeout.resolve(context), started
+            )
+        return value
+
+
+@register.tag
+def guarded_cache(parser, token):
+    """Аналог {% cache %}, который не кеширует устаревший фрагмент.
+
+    Ключ фрагмента служит и суррогатным ключом: его сбрасывают
+    через surrogate.purge. Если это произошло во время рендеринга,
+    фрагмент отдаётся, но не сохраняется.
+    """
+    nodelist = parser.parse(('endguarded_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments."
+        )
+    return GuardedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.holes import placeholder, punching_holes, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **kwargs):
+    """Персональный участок страницы.
+
+    При сохранении страницы в общий кеш выводит заглушку,
+    иначе рендерит шаблон сразу. Шаблон видит только kwargs,
+    контекст-процессоры и данные зарегистрированной hole_context.
+    """
+    request = context.get('request')
+    if punching_holes(request):
+        return mark_safe(placeholder(template_name, kwargs))
+    return render_hole(request, template_name, kwargs)
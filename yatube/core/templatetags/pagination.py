@@ -0,0 +1,23 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, around=2):
+    """Номера страниц вокруг текущей, первая и последняя.
+
+    Разрывы обозначаются None. Полный page_range не строится,
+    поэтому размер ответа не зависит от числа страниц.
+    """
+    last = page_obj.paginator.num_pages
+    current = page_obj.number
+    pages = sorted({1, last} | set(range(
+        max(current - around, 1), min(current + around, last) + 1
+    )))
+    window = []
+    for page in pages:
+        if window and page - window[-1] > 1:
+            window.append(None)
+        window.append(page)
+    return window
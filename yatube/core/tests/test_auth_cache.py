@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..backends.auth import CachedModelBackend, user_key
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', password='старый-пароль-123'
+        )
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_page_without_queries(self):
+        """Проверяем, что страница из кеша не обращается к БД"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertContains(response, 'Пользователь: reader')
+
+    def test_user_edit_invalidates(self):
+        """Проверяем, что изменение пользователя сбрасывает кеш"""
+        self.client.get(reverse('posts:index'))
+        self.assertIsNotNone(cache.get(user_key(self.user.pk)))
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Пользователь: reader'
+        )
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Проверяем, что смена пароля завершает старые сессии"""
+        other = Client()
+        other.force_login(self.user)
+        other.get(reverse('posts:index'))
+        self.client.post(reverse('password_change'), {
+            'old_password': 'старый-пароль-123',
+            'new_password1': 'новый-пароль-456',
+            'new_password2': 'новый-пароль-456',
+        })
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Пользователь: reader'
+        )
+        self.assertNotContains(
+            other.get(reverse('posts:index')), 'Пользователь: reader'
+        )
+
+    def test_logout_forgets_user(self):
+        """Проверяем, что выход удаляет пользователя из кеша"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+
+    def test_save_during_load_not_cached(self):
+        """Проверяем, что изменённый при чтении пользователь не кешируется"""
+        load = ModelBackend.get_user
+
+        def load_then_save(backend, user_id):
+            stale = load(backend, user_id)
+            User.objects.get(pk=user_id).save()
+            return stale
+
+        backend = CachedModelBackend()
+        with mock.patch.object(ModelBackend, 'get_user', load_then_save):
+            backend.get_user(self.user.pk)
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(backend.get_user(self.user.pk))
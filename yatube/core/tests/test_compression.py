@@ -0,0 +1,127 @@
+import gzip
+import zlib
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import compression
+from core.middleware.compression import CompressionMiddleware, negotiate
+
+PAGE = ('<article>Пост в ленте</article>\n' * 200).encode()
+
+
+class NegotiateTest(TestCase):
+    def test_gzip_without_brotli(self):
+        """Проверяем, что без пакета brotli выбирается gzip"""
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(negotiate('gzip, deflate, br'), 'gzip')
+
+    def test_brotli_preferred(self):
+        """Проверяем, что при равных весах выбирается brotli"""
+        with mock.patch.object(compression, 'brotli', mock.Mock()):
+            self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+            self.assertEqual(negotiate('br;q=0.5, gzip'), 'gzip')
+
+    def test_refused(self):
+        """Проверяем, что q=0, identity и пустой заголовок отключают сжатие"""
+        self.assertIsNone(negotiate(''))
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate('gzip;q=0'))
+        self.assertEqual(negotiate('*'), negotiate('gzip, br'))
+
+
+@override_settings(COMPRESSION_ENABLED=True)
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding)
+        request.user = AnonymousUser()
+        return request
+
+    def test_gzip_response(self):
+        """Проверяем сжатие страницы в gzip и её заголовки"""
+        response = CompressionMiddleware(lambda r: HttpResponse(PAGE))(
+            self.request()
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+
+    def test_not_accepted(self):
+        """Проверяем, что без Accept-Encoding выставляется только Vary"""
+        response = CompressionMiddleware(lambda r: HttpResponse(PAGE))(
+            self.request('')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, PAGE)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_short_and_binary_skipped(self):
+        """Проверяем, что короткие и нетекстовые ответы не сжимаются"""
+        for response in (
+            HttpResponse(b'ok'),
+            HttpResponse(PAGE, content_type='image/jpeg'),
+        ):
+            with self.subTest(content_type=response['Content-Type']):
+                result = CompressionMiddleware(lambda r: response)(
+                    self.request()
+                )
+                self.assertFalse(result.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        """Проверяем сжатие потокового ответа по частям без Content-Length"""
+        chunks = [PAGE[:1000], PAGE[1000:4000], PAGE[4000:]]
+        response = CompressionMiddleware(
+            lambda r: StreamingHttpResponse(iter(chunks))
+        )(self.request())
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 1)
+        decompressor = zlib.decompressobj(31)
+        first = decompressor.decompress(parts[0])
+        self.assertEqual(first, chunks[0])
+        self.assertEqual(
+            first + decompressor.decompress(b''.join(parts[1:])), PAGE
+        )
+
+    def test_shared_page_compressed_once(self):
+        """Проверяем, что сжатая общая страница берётся из кеша"""
+        def get_response(request):
+            response = HttpResponse(PAGE)
+            response['Surrogate-Key'] = 'posts'
+            return response
+
+        middleware = CompressionMiddleware(get_response)
+        with mock.patch.object(
+            compression, 'compress', wraps=compression.compress
+        ) as compress:
+            first = middleware(self.request())
+            second = middleware(self.request())
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_bytes_counted(self):
+        """Проверяем, что объём до и после сжатия попадает в метрики"""
+        before = compression.compression_bytes.snapshot()
+        CompressionMiddleware(lambda r: HttpResponse(PAGE))(self.request())
+        after = compression.compression_bytes.snapshot()
+        key = ('<unresolved>', 'gzip', 'original')
+        self.assertEqual(after[key] - before.get(key, 0), len(PAGE))
+
+    @override_settings(COMPRESSION_ENABLED=False)
+    def test_disabled(self):
+        """Проверяем, что настройка отключает сжатие"""
+        response = CompressionMiddleware(lambda r: HttpResponse(PAGE))(
+            self.request()
+        )
+        self.assertEqual(response.content, PAGE)
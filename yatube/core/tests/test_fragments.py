@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import TestCase
+
+from .. import surrogate
+
+KEY = make_template_fragment_key('article', [1])
+
+
+class GuardedCacheTests(TestCase):
+    template = Template(
+        '{% load fragments %}'
+        '{% guarded_cache 60 article 1 %}{{ text }}{% endguarded_cache %}'
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, text):
+        return self.template.render(Context({'text': text}))
+
+    def test_fragment_cached_until_purge(self):
+        """Проверяем, что фрагмент берётся из кеша до сброса ключа"""
+        self.assertEqual(self.render('старый'), 'старый')
+        self.assertEqual(self.render('новый'), 'старый')
+        surrogate.purge(KEY)
+        self.assertEqual(self.render('новый'), 'новый')
+
+    def test_purge_during_render_not_stored(self):
+        """Проверяем, что сброшенный при рендеринге фрагмент не кешируется"""
+        def edit():
+            surrogate.purge(KEY)
+            return 'старый'
+
+        self.assertEqual(self.render(edit), 'старый')
+        self.assertIsNone(surrogate.fetch(KEY))
+        self.assertEqual(self.render('новый'), 'новый')
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import surrogate
+from core.holes import shared_page_cache
+from posts import utils
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class SharedPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовое описание группы',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_holes_filled_per_user(self):
+        """Проверяем, что общий кеш не смешивает персональные участки"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        author_page = self.author_client.get(url).content.decode()
+        reader_page = self.reader_client.get(url).content.decode()
+        guest_page = Client().get(url).content.decode()
+
+        self.assertIn('Пользователь: author', author_page)
+        self.assertIn('редактировать запись', author_page)
+        self.assertIn('Пользователь: reader', reader_page)
+        self.assertNotIn('Пользователь: author', reader_page)
+        self.assertNotIn('редактировать запись', reader_page)
+        self.assertIn('csrfmiddlewaretoken', reader_page)
+        self.assertNotIn('csrfmiddlewaretoken', guest_page)
+        self.assertNotIn('<!--hole:', reader_page)
+
+    def test_cache_hit_skips_view(self):
+        """Проверяем, что повторный запрос отдаётся из кеша"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.reader_client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        response = self.author_client.get(url)
+        self.assertContains(response, 'Тестовый текст')
+        self.assertContains(response, 'Пользователь: author')
+
+    def test_cache_hit_keeps_headers(self):
+        """Проверяем, что ответ из кеша сохраняет заголовки и ключи"""
+        calls = []
+
+        @shared_page_cache()
+        def view(request):
+            calls.append(request)
+            surrogate.add_surrogate_keys(request, 'posts')
+            response = HttpResponse('страница', content_type='text/plain')
+            response['Cache-Control'] = 'max-age=60'
+            response['Vary'] = 'Accept-Language'
+            response.set_cookie('personal', '1')
+            return response
+
+        factory = RequestFactory()
+        view(factory.get('/page/'))
+        request = factory.get('/page/')
+        response = view(request)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.content, 'страница'.encode())
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Cache-Control'], 'max-age=60')
+        self.assertEqual(response['Vary'], 'Accept-Language')
+        self.assertEqual(response['Surrogate-Key'], 'posts')
+        self.assertEqual(surrogate.surrogate_keys(request), ['posts'])
+        self.assertFalse(response.cookies)
+
+    def test_post_save_invalidates_pages(self):
+        """Проверяем, что новый пост сбрасывает кеш страниц"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.reader_client.get(url)
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        self.assertContains(self.reader_client.get(url), 'Новый пост')
+
+    def test_follow_button_is_personal(self):
+        """Проверяем кнопку подписки на закешированном профиле"""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.author_client.get(url)
+        self.assertContains(self.reader_client.get(url), 'Подписаться')
+        self.assertNotContains(self.author_client.get(url), 'Подписаться')
+
+    def test_purge_during_render_not_cached(self):
+        """Проверяем, что сброшенная при рендеринге страница не кешируется"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+
+        def purging(request, posts):
+            surrogate.purge(f'group-{self.group.pk}')
+            return utils.tag_posts(request, posts)
+
+        with mock.patch('posts.views.tag_posts', side_effect=purging):
+            self.reader_client.get(url)
+        Group.objects.filter(pk=self.group.pk).update(title='Без сигнала')
+        self.assertContains(self.reader_client.get(url), 'Без сигнала')
@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+from .. import identity
+
+User = get_user_model()
+
+
+class IdentityMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+            for i in range(3)
+        ]
+        for user in (cls.author, cls.reader, cls.author, cls.reader):
+            Comment.objects.create(
+                text='Комментарий', author=user, post=cls.posts[0]
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return len(queries)
+
+    def test_fewer_queries(self):
+        """Проверяем, что с картой повторные авторы и группы не грузятся"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.posts[0].pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                plain = self.count_queries(url)
+                with override_settings(IDENTITY_MAP_ENABLED=True):
+                    mapped = self.count_queries(url)
+                self.assertLess(mapped, plain)
+
+    @override_settings(
+        STREAMING_RENDER_ENABLED=True, STREAMING_RENDER_MIN_CHUNK=0
+    )
+    def test_fewer_queries_when_streaming(self):
+        """Проверяем, что карта работает и при потоковом рендеринге"""
+        url = reverse('posts:index')
+        plain = self.count_queries(url)
+        with override_settings(IDENTITY_MAP_ENABLED=True):
+            cache.clear()
+            mapped = self.count_queries(url)
+        self.assertLess(mapped, plain)
+
+    def test_get_by_pk_and_memoized_reads(self):
+        """Проверяем повторное использование объектов и выборок"""
+        with identity.activate():
+            post = Post.objects.get(pk=self.posts[0].pk)
+            list(Group.objects.filter(slug='test-slug'))
+            with self.assertNumQueries(0):
+                self.assertIs(Post.objects.get(pk=str(post.pk)), post)
+                list(Group.objects.filter(slug='test-slug'))
+            comments = list(post.comments.all())
+            with self.assertNumQueries(2):
+                authors = {comment.author for comment in comments}
+            self.assertEqual(len(authors), 2)
+
+    def test_write_clears_map(self):
+        """Проверяем, что запись сбрасывает карту"""
+        with identity.activate() as current:
+            stale = Post.objects.get(pk=self.posts[1].pk)
+            list(Post.objects.filter(text='Пост 1'))
+            Post.objects.filter(pk=stale.pk).update(text='Изменён')
+            self.assertEqual(current.objects, {})
+            self.assertEqual(current.queries, {})
+            self.assertEqual(
+                Post.objects.get(pk=stale.pk).text, 'Изменён'
+            )
+
+    def test_get_locking_and_other_db_query(self):
+        """Проверяем, что select_for_update и чужая база идут в БД"""
+        with identity.activate() as current:
+            post = Post.objects.get(pk=self.posts[0].pk)
+            with self.assertNumQueries(1):
+                Post.objects.select_for_update().get(pk=post.pk)
+            post._state.db = 'other'
+            current.queries.clear()
+            with self.assertNumQueries(1):
+                self.assertIsNot(Post.objects.get(pk=post.pk), post)
+
+    def test_values_get_not_from_map(self):
+        """Проверяем, что values() и values_list() с get() минуют карту"""
+        with identity.activate():
+            post = Post.objects.get(pk=self.posts[0].pk)
+            self.assertEqual(
+                Post.objects.values('text').get(pk=post.pk),
+                {'text': post.text},
+            )
+            self.assertEqual(
+                Post.objects.values_list('text', flat=True).get(pk=post.pk),
+                post.text,
+            )
+            self.assertEqual(
+                Post.objects.values_list('pk', 'text').get(pk=post.pk),
+                (post.pk, post.text),
+            )
+
+    @override_settings(IDENTITY_MAP_ENABLED=True)
+    def test_write_in_request(self):
+        """Проверяем, что после записи в запросе данные не устаревают"""
+        client = Client()
+        client.force_login(self.reader)
+        kwargs = {'post_id': self.posts[0].pk}
+        client.post(
+            reverse('posts:add_comment', kwargs=kwargs),
+            {'text': 'Новый комментарий'},
+        )
+        self.assertContains(
+            client.get(reverse('posts:post_detail', kwargs=kwargs)),
+            'Новый комментарий',
+        )
+
+
+class IdentityMapRollbackTests(TransactionTestCase):
+    def test_rollback_clears_map(self):
+        """Проверяем, что откат транзакции сбрасывает карту"""
+        group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        with identity.activate():
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    Group.objects.filter(pk=group.pk).update(title='Откат')
+                    self.assertEqual(
+                        Group.objects.get(pk=group.pk).title, 'Откат'
+                    )
+                    raise RuntimeError
+            self.assertEqual(Group.objects.get(pk=group.pk).title, 'Группа')
+        self.assertNotIn('rollback', vars(connections['default']))
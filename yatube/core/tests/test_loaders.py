@@ -0,0 +1,85 @@
+from django.template import Context, Engine
+from django.template.loaders import locmem
+from django.test import SimpleTestCase
+
+from core.loaders import MinifyMixin, minify
+from core.warmup import django_backends
+
+SOURCE = (
+    '<div>\n'
+    '    <!-- шапка -->\n'
+    '    <p>\n'
+    '        {{ text }}   \n'
+    '    </p>\n'
+    '\n'
+    '    <pre>\n'
+    '    отступ\n'
+    '    </pre>\n'
+    '    <textarea>  a\n'
+    '      b</textarea>\n'
+    '    <!--[if IE]>ie<![endif]-->\n'
+    '</div>\n'
+)
+
+
+class MinifyLoader(MinifyMixin, locmem.Loader):
+    pass
+
+
+class MinifyTest(SimpleTestCase):
+    def test_whitespace_and_comments_removed(self):
+        """Проверяем, что отступы, хвостовые пробелы и комментарии убраны"""
+        result = minify(SOURCE)
+        self.assertIn('<div>\n\n<p>\n{{ text }}\n</p>', result)
+        self.assertNotIn('шапка', result)
+        self.assertIn('<!--[if IE]>ie<![endif]-->', result)
+
+    def test_preformatted_untouched(self):
+        """Проверяем, что содержимое pre и textarea не меняется"""
+        result = minify(SOURCE)
+        self.assertIn('<pre>\n    отступ\n    </pre>', result)
+        self.assertIn('<textarea>  a\n      b</textarea>', result)
+
+    def test_line_numbers_kept(self):
+        """Проверяем, что число строк шаблона сохраняется"""
+        self.assertEqual(minify(SOURCE).count('\n'), SOURCE.count('\n'))
+
+    def test_loader(self):
+        """Проверяем, что минифицируются только HTML-шаблоны"""
+        engine = Engine(loaders=[(
+            'core.tests.test_loaders.MinifyLoader', {
+                'page.html': '<p>\n    {{ text }}\n</p>',
+                'page.txt': '<p>\n    {{ text }}\n</p>',
+                'password_reset_email.html': 'Ссылка:\n    {{ text }}',
+            },
+        )])
+        context = Context({'text': 'пост'})
+        self.assertEqual(
+            engine.get_template('page.html').render(context),
+            '<p>\nпост\n</p>'
+        )
+        self.assertEqual(
+            engine.get_template('page.txt').render(context),
+            '<p>\n    пост\n</p>'
+        )
+        self.assertEqual(
+            engine.get_template('password_reset_email.html').render(context),
+            'Ссылка:\n    пост'
+        )
+
+    def test_project_templates_compile(self):
+        """Проверяем, что все шаблоны проекта разбираются после минификации"""
+        project = django_backends()[0].engine
+        engine = Engine(
+            dirs=project.dirs,
+            loaders=['core.loaders.FilesystemLoader'],
+            libraries=project.libraries,
+            builtins=project.builtins,
+        )
+        names = [
+            'base.html', 'posts/index.html', 'posts/post_detail.html',
+            'posts/includes/post_article.html',
+        ]
+        for name in names:
+            with self.subTest(name=name):
+                engine.get_template(name)
@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import tempfile
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+
+from posts.models import Post
+
+from ..management.commands.loadtest import Worker
+
+User = get_user_model()
+
+
+def response(status, url, location=None):
+    result = requests.Response()
+    result.status_code = status
+    result.url = url
+    if location:
+        result.headers['Location'] = location
+    return result
+
+
+class LoadtestUnitTests(TestCase):
+    def test_login_redirect_is_error(self):
+        """Проверяем, что переадресация на вход считается ошибкой"""
+        worker = Worker(0, {
+            'url': 'http://testserver', 'user_prefix': 'seed',
+            'password': 'password', 'mix': {'index': 1},
+        }, [1], None, [])
+        login = 'http://testserver/auth/login/?next=/follow/'
+        self.assertFalse(worker.succeeded(response(200, login)))
+        self.assertFalse(worker.succeeded(response(
+            302, 'http://testserver/create/', '/auth/login/?next=/create/'
+        )))
+        self.assertTrue(worker.succeeded(response(
+            302, 'http://testserver/create/', '/profile/seed0/'
+        )))
+        self.assertFalse(
+            worker.succeeded(response(500, 'http://testserver/'))
+        )
+
+    def test_bad_mix(self):
+        """Проверяем, что неверная смесь сценариев даёт CommandError"""
+        for mix in ('index=много', 'unknown=1', 'index=-1', 'index=0'):
+            with self.subTest(mix=mix):
+                with self.assertRaises(CommandError):
+                    call_command('loadtest', '--mix', mix)
+
+
+class LoadtestTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='seed0', password='password'
+        )
+        Post.objects.create(text='Пост', author=self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'loadtest.json')
+
+    def run_loadtest(self, mix, *args):
+        call_command(
+            'loadtest', '--concurrency', '1', '--duration', '1',
+            '--interval', '0.7', '--mix', mix, '--output', self.output,
+            *args, stdout=io.StringIO(),
+        )
+        with open(self.output) as source:
+            return json.load(source)
+
+    def test_report(self):
+        """Проверяем отчёт: ошибок нет, rps считается по длине окна"""
+        report = self.run_loadtest('add_comment=1,follow_index=1')
+        for name in ('add_comment', 'follow_index'):
+            self.assertEqual(report['summary'][name]['error_rate'], 0)
+        total = sum(row['requests'] for row in report['summary'].values())
+        points = report['timeline']
+        self.assertEqual(len(points), 2)
+        counted = points[0]['rps'] * 0.7 + points[1]['rps'] * 0.3
+        self.assertAlmostEqual(counted, total, delta=total * 0.2 + 1)
+
+    def test_failed_login_is_error(self):
+        """Проверяем, что без входа сценарии считаются ошибками"""
+        report = self.run_loadtest(
+            'add_comment=1,follow_index=1,post_create=1',
+            '--password', 'неверный',
+        )
+        for row in report['summary'].values():
+            self.assertEqual(row['error_rate'], 1)
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.lookups import groups, users
+from posts.models import Group
+
+from ..lookup import LRU, lookup_requests
+
+User = get_user_model()
+
+
+class LRUTests(TestCase):
+    def test_bounded(self):
+        """Проверяем, что вытесняется давно не читанная запись"""
+        lru = LRU(size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+
+    def test_ttl(self):
+        """Проверяем, что запись живёт не дольше TTL"""
+        lru = LRU(size=2, ttl=-1)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+
+
+@override_settings(LOOKUP_CACHE_ENABLED=True)
+class TwoTierLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        users.clear()
+        self.addCleanup(groups.clear)
+        self.addCleanup(users.clear)
+
+    def hits(self, tier):
+        return lookup_requests.snapshot().get(('group.slug', tier, 'hit'), 0)
+
+    def test_tiers(self):
+        """Проверяем порядок: БД, затем память процесса, затем общий кеш"""
+        local, shared = self.hits('local'), self.hits('shared')
+        with self.assertNumQueries(1):
+            self.assertEqual(groups.get('test-slug'), self.group)
+        with self.assertNumQueries(0):
+            groups.get('test-slug')
+        self.assertEqual(self.hits('local'), local + 1)
+        groups.clear()
+        with self.assertNumQueries(0):
+            groups.get('test-slug')
+        self.assertEqual(self.hits('shared'), shared + 1)
+
+    def test_save_invalidates(self):
+        """Проверяем, что смена slug сбрасывает старую и новую записи"""
+        groups.get('test-slug')
+        self.group.slug = 'new-slug'
+        self.group.save()
+        with self.assertRaises(Group.DoesNotExist):
+            groups.get('test-slug')
+        self.assertEqual(groups.get('new-slug').slug, 'new-slug')
+
+    def test_save_during_read_not_cached(self):
+        """Проверяем, что объект, изменённый во время чтения, не кешируется"""
+        manager = Group._default_manager
+        read = manager.get
+
+        def racing(**lookup):
+            stale = read(**lookup)
+            fresh = read(pk=stale.pk)
+            fresh.slug = 'renamed'
+            fresh.save()
+            return stale
+
+        with mock.patch.object(manager, 'get', side_effect=racing):
+            groups.get('test-slug')
+        with self.assertRaises(Group.DoesNotExist):
+            groups.get('test-slug')
+
+    def test_copies_are_independent(self):
+        """Проверяем, что вызовы получают независимые копии"""
+        first = groups.get('test-slug')
+        second = groups.get('test-slug')
+        self.assertIsNot(first._state, second._state)
+        first.title = 'Изменено'
+        self.assertEqual(groups.get('test-slug').title, 'Группа')
+
+    def test_delete_invalidates(self):
+        """Проверяем, что удалённый пользователь не отдаётся из кеша"""
+        users.get('author')
+        User.objects.get(username='author').delete()
+        with self.assertRaises(User.DoesNotExist):
+            users.get('author')
+
+    def test_views(self):
+        """Проверяем, что страницы группы и профиля берут объект из кеша"""
+        client = Client()
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+        self.assertIsNotNone(cache.get(groups.value_key('test-slug')))
+        self.assertIsNotNone(cache.get(users.value_key('author')))
+        self.assertEqual(client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        ).status_code, 404)
@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+
+from ..mail import deliver, due, spool_path
+
+
+class CountingBackend(EmailBackend):
+    """locmem, считающий открытые соединения; адрес fail@ не принимает."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'fail@example.com' in message.to:
+                raise ConnectionError('сервер отказал')
+        return super().send_messages(messages)
+
+
+class DownBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('сервер недоступен')
+
+
+class SpoolMailTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            EMAIL_BACKEND='core.backends.mail.SpoolEmailBackend',
+            EMAIL_SPOOL_DIR=directory.name,
+            EMAIL_SPOOL_BACKEND='core.tests.test_mail.CountingBackend',
+            EMAIL_SPOOL_BATCH_SIZE=2,
+            EMAIL_SPOOL_MAX_ATTEMPTS=2,
+            EMAIL_SPOOL_RETRY_BACKOFF=60,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        CountingBackend.opened = 0
+
+    def send(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail('Тема', 'Текст', 'yatube@example.com', [recipient])
+
+    def test_spool_does_not_send(self):
+        """Проверяем, что письмо ложится в спул, а не отправляется"""
+        self.send('user@example.com')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(len(due()), 1)
+
+    def test_batches_share_connection(self):
+        """Проверяем отправку пачками по одному соединению"""
+        self.send(*(f'user{i}@example.com' for i in range(5)))
+        out = io.StringIO()
+        call_command('sendmail', stdout=out)
+        self.assertIn('sent: 5', out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+        self.assertEqual(CountingBackend.opened, 3)
+        self.assertEqual(os.listdir(spool_path('new')), [])
+
+    def test_retry_then_failed(self):
+        """Проверяем повтор с задержкой и перенос в failed"""
+        self.send('fail@example.com', 'user@example.com')
+        self.assertEqual(deliver(), {'retry': 1, 'sent': 1})
+        self.assertEqual(due(), [])
+        self.assertEqual(len(due(time.time() + 61)), 1)
+        self.assertEqual(deliver(), {})
+        with override_settings(EMAIL_SPOOL_RETRY_BACKOFF=0):
+            self.send('fail@example.com')
+            self.assertEqual(deliver(), {'retry': 1, 'failed': 1})
+        self.assertEqual(len(os.listdir(spool_path('failed'))), 2)
+
+    @override_settings(
+        EMAIL_SPOOL_BACKEND='core.tests.test_mail.DownBackend'
+    )
+    def test_connection_failure_keeps_batch(self):
+        """Проверяем, что недоступный сервер откладывает всю пачку"""
+        self.send('a@example.com', 'b@example.com')
+        self.assertEqual(deliver(), {'retry': 2})
+        self.assertEqual(len(os.listdir(spool_path('new'))), 2)
+
+    @override_settings(EMAIL_SPOOL_USE_JOBS=True)
+    def test_job_integration(self):
+        """Проверяем, что спул доставляется фоновой задачей"""
+        self.send('user@example.com', 'fail@example.com', 'other@example.com')
+        jobs = Job.objects.filter(task='core.send_mail')
+        self.assertEqual(jobs.count(), 1)
+        call_command('runworker', '--once', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        queued = jobs.filter(status=Job.QUEUED)
+        self.assertEqual(queued.count(), 1)
+        self.send('late@example.com')
+        self.assertEqual(queued.count(), 1)
+        self.assertTrue(queued.get().run_at <= timezone.now())
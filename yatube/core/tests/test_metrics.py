@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..metrics import Histogram, REGISTRY
+
+User = get_user_model()
+
+
+class HistogramTest(TestCase):
+    def test_observe_puts_value_into_bucket(self):
+        """Проверяем распределение значений по корзинам"""
+        histogram = Histogram('test', 'test', ('view',), buckets=(1, 10))
+        histogram.observe(0.5, view='a')
+        histogram.observe(5, view='a')
+        histogram.observe(50, view='a')
+        counts, total, count = histogram.snapshot()[('a',)]
+        self.assertEqual(counts, [1, 1, 1])
+        self.assertEqual(total, 55.5)
+        self.assertEqual(count, 3)
+
+
+class MetricsViewTest(TestCase):
+    def test_metrics_exposes_view_histograms(self):
+        """Проверяем, что /metrics отдаёт метрики по имени представления"""
+        client = Client()
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"}',
+            content
+        )
+        self.assertIn('yatube_db_queries_bucket', content)
+        self.assertIn('# TYPE yatube_cache_requests_total counter', content)
+
+    def test_metrics_forbidden_for_remote_clients(self):
+        """Проверяем, что /metrics закрыт для внешних адресов"""
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_registry_render_format(self):
+        """Проверяем формат экспозиции Prometheus"""
+        content = REGISTRY.render()
+        self.assertIn(
+            '# TYPE yatube_request_duration_seconds histogram', content
+        )
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+        cls.user = User.objects.create_user(username='user')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cpu_profile_for_staff(self):
+        """Проверяем, что персонал получает отчёт cProfile"""
+        response = self.staff_client.get(
+            reverse('posts:index'), {'_profile': 'cpu'}
+        )
+        self.assertTemplateUsed(response, 'core/profile.html')
+        self.assertIn('function calls', response.context['report'])
+
+    def test_cpu_profile_sort(self):
+        """Проверяем сортировку отчёта и замену неизвестного ключа"""
+        for sort, expected in (
+            ('tottime', 'internal time'),
+            ('time', 'internal time'),
+            ('bogus', 'cumulative time'),
+        ):
+            with self.subTest(sort=sort):
+                cache.clear()
+                response = self.staff_client.get(
+                    reverse('posts:index'),
+                    {'_profile': 'cpu', '_profile_sort': sort},
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    f'Ordered by: {expected}', response.context['report']
+                )
+
+    def test_memory_profile_download(self):
+        """Проверяем выгрузку отчёта tracemalloc файлом"""
+        response = self.staff_client.get(
+            reverse('posts:index'),
+            {'_profile': 'mem', '_profile_format': 'download'}
+        )
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_profile_ignored_for_regular_user(self):
+        """Проверяем, что обычный пользователь получает обычную страницу"""
+        response = self.user_client.get(
+            reverse('posts:index'), {'_profile': 'cpu'}
+        )
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertTemplateNotUsed(response, 'core/profile.html')
+
+    @override_settings(PROFILING_RATE=1)
+    def test_profile_rate_limited(self):
+        """Проверяем ограничение частоты профилирования"""
+        url = reverse('posts:index')
+        self.staff_client.get(url, {'_profile': 'cpu'})
+        response = self.staff_client.get(url, {'_profile': 'cpu'})
+        self.assertTemplateNotUsed(response, 'core/profile.html')
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..middleware.ratelimit import RateLimitMiddleware
+from ..ratelimit import TokenBucket
+
+User = get_user_model()
+
+LIMITS = {
+    'posts:add_comment': {'user': (2, 60), 'ip': (3, 60)},
+    'posts:profile_follow': {'methods': ('GET',), 'user': (1, 60)},
+}
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket(2, 60)
+
+    def consume(self, now):
+        return self.bucket.consume('user', 1, 'view', now=now)
+
+    def test_burst_then_retry_after(self):
+        """Проверяем, что после исчерпания ведра возвращается задержка"""
+        self.assertEqual(self.consume(100), 0)
+        self.assertEqual(self.consume(100), 0)
+        self.assertEqual(self.consume(100), 30)
+
+    def test_refill(self):
+        """Проверяем, что токены пополняются со временем"""
+        self.consume(100)
+        self.consume(100)
+        self.assertEqual(self.consume(110), 20)
+        self.assertEqual(self.consume(130), 0)
+        self.assertEqual(self.consume(130), 30)
+
+    def test_idle_capped_at_capacity(self):
+        """Проверяем, что простой не копит токены сверх ёмкости"""
+        self.consume(100)
+        self.assertEqual(self.consume(1000), 0)
+        self.assertEqual(self.consume(1000), 0)
+        self.assertEqual(self.consume(1000), 30)
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS=LIMITS)
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_user_limit(self):
+        """Проверяем, что сверх лимита пользователь получает 429"""
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(self.url, {'text': 'Ок'}).status_code, 302
+            )
+        response = self.client.post(self.url, {'text': 'Много'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_ip_limit_for_anonymous(self):
+        """Проверяем, что анонимы ограничиваются по IP"""
+        client = Client()
+        statuses = [client.post(self.url).status_code for _ in range(4)]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+        other = Client(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.post(self.url).status_code, 302)
+
+    def test_ip_from_proxy_header(self):
+        """Проверяем, что за прокси клиенты получают разные вёдра по IP"""
+        with override_settings(
+            RATELIMIT_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR'
+        ):
+            for address in ('10.0.0.1', '10.0.0.2'):
+                client = Client(REMOTE_ADDR='192.168.0.1')
+                statuses = [
+                    client.post(
+                        self.url,
+                        HTTP_X_FORWARDED_FOR=f'1.2.3.4, {address}',
+                    ).status_code
+                    for _ in range(4)
+                ]
+                self.assertEqual(statuses, [302, 302, 302, 429])
+
+    def test_client_ip(self):
+        """Проверяем выбор адреса клиента из цепочки прокси"""
+        cases = (
+            (None, 1, '192.168.0.1'),
+            ('HTTP_X_FORWARDED_FOR', 1, '10.0.0.2'),
+            ('HTTP_X_FORWARDED_FOR', 2, '10.0.0.1'),
+            ('HTTP_X_FORWARDED_FOR', 5, '10.0.0.1'),
+            ('HTTP_X_REAL_IP', 1, '192.168.0.1'),
+        )
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='192.168.0.1',
+            HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.0.2',
+        )
+        for header, proxies, expected in cases:
+            with self.subTest(header=header, proxies=proxies):
+                with override_settings(
+                    RATELIMIT_CLIENT_IP_HEADER=header,
+                    RATELIMIT_TRUSTED_PROXIES=proxies,
+                ):
+                    self.assertEqual(
+                        RateLimitMiddleware.client_ip(request), expected
+                    )
+
+    def test_methods(self):
+        """Проверяем, что ограничиваются только указанные методы"""
+        url = reverse('posts:profile_follow', kwargs={'username': 'author'})
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        for _ in range(3):
+            self.assertEqual(self.client.get(
+                reverse('posts:profile', kwargs={'username': 'author'})
+            ).status_code, 200)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """Проверяем, что без RATELIMIT_ENABLED лимитов нет"""
+        for _ in range(4):
+            self.assertEqual(self.client.post(self.url).status_code, 302)
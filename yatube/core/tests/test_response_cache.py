@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import surrogate
+from posts import utils
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class AnonymousResponseCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовое описание группы',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+
+    def test_surrogate_key_header(self):
+        """Проверяем заголовок Surrogate-Key"""
+        response = self.client.get(self.url)
+        keys = response['Surrogate-Key'].split()
+        self.assertIn(f'post-{self.post.pk}', keys)
+        self.assertIn(f'author-{self.author.pk}', keys)
+        self.assertIn(f'group-{self.group.pk}', keys)
+
+    def test_anonymous_response_cached(self):
+        """Проверяем, что анонимный ответ отдаётся из кеша"""
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Тестовый текст')
+        self.assertIn(f'post-{self.post.pk}', response['Surrogate-Key'])
+
+    def test_comment_purges_tagged_entries_only(self):
+        """Проверяем, что комментарий сбрасывает только страницы поста"""
+        other = Post.objects.create(text='Другой пост', author=self.author)
+        other_url = reverse('posts:post_detail', kwargs={'post_id': other.id})
+        self.client.get(self.url)
+        self.client.get(other_url)
+        Post.objects.filter(pk=other.pk).update(text='Без сигнала')
+        Comment.objects.create(
+            text='Новый комментарий', post=self.post, author=self.author
+        )
+        self.assertContains(self.client.get(self.url), 'Новый комментарий')
+        self.assertContains(self.client.get(other_url), 'Другой пост')
+
+    def test_authenticated_not_cached(self):
+        """Проверяем, что ответы авторизованным не кешируются"""
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        self.assertContains(client.get(self.url), 'Без сигнала')
+
+    def test_cached_feed_conditional_get(self):
+        """Проверяем, что ответ из кеша учитывает If-None-Match"""
+        url = reverse('posts:feed_atom')
+        etag = self.client.get(url)['ETag']
+        self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_purge_during_render_not_cached(self):
+        """Проверяем, что сброс во время рендеринга не кеширует ответ"""
+        def purging(request, posts):
+            surrogate.purge(f'post-{self.post.pk}')
+            return utils.tag_posts(request, posts)
+
+        with mock.patch('posts.views.tag_posts', side_effect=purging):
+            self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        self.assertContains(self.client.get(self.url), 'Без сигнала')
+
+    def test_store_checks_render_start(self):
+        """Проверяем, что store отвергает значение, сброшенное после start"""
+        started = surrogate.start()
+        surrogate.purge('posts')
+        self.assertFalse(
+            surrogate.store('key', 'value', ['posts'], 60, started)
+        )
+        self.assertIsNone(surrogate.fetch('key'))
+        self.assertTrue(
+            surrogate.store('key', 'value', ['posts'], 60, surrogate.start())
+        )
+        self.assertEqual(surrogate.fetch('key'), 'value')
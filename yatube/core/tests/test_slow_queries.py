@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_query_attributed_to_view_and_template(self):
+        """Проверяем, что медленный запрос привязан к view и шаблону"""
+        with self.assertLogs('yatube.slow_queries') as logs:
+            Client().get(
+                reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+            )
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertTrue(all(
+            entry['view'] == 'posts:post_detail' for entry in entries
+        ))
+        template_entries = [entry for entry in entries if entry['template']]
+        self.assertTrue(template_entries)
+        self.assertEqual(
+            template_entries[0]['template'], 'posts/post_detail.html'
+        )
+        self.assertTrue(any(
+            'posts/views.py' in frame
+            for entry in entries for frame in entry['stack']
+        ))
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_params_redacted(self):
+        """Проверяем, что значения параметров пишутся только при отладке"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        for log_params, expected in (
+            (False, 'int'), (True, str(self.post.id)),
+        ):
+            with self.subTest(log_params=log_params):
+                with override_settings(SLOW_QUERY_LOG_PARAMS=log_params):
+                    with self.assertLogs('yatube.slow_queries') as logs:
+                        Client().get(url)
+                params = [
+                    json.loads(record.getMessage())['params']
+                    for record in logs.records
+                ]
+                self.assertIn([expected], params)
+                if not log_params:
+                    self.assertNotIn([str(self.post.id)], params)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_lazy_user_query_logged(self):
+        """Проверяем, что запрос при загрузке request.user пишется в журнал"""
+        client = Client()
+        client.force_login(self.author)
+        with self.assertLogs('yatube.slow_queries'):
+            response = client.get(
+                reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_page_available_for_staff(self):
+        """Проверяем, что страница журнала доступна только персоналу"""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = Client()
+        response = client.get(reverse('slow_queries'))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(staff)
+        response = client.get(reverse('slow_queries'))
+        self.assertEqual(response.status_code, 200)
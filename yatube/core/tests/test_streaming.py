@@ -0,0 +1,222 @@
+import re
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signals import got_request_exception
+from django.template.backends.django import DjangoTemplates
+from django.template.loader_tags import BlockNode
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.streaming import HANDLERS, buffered, iter_block, iter_template
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+
+TEMPLATES = {
+    'base.html': (
+        '<head>{% block title %}Сайт{% endblock %}</head>'
+        '<main>{% block content %}{% endblock %}</main>'
+    ),
+    'page.html': (
+        '{% extends "base.html" %}'
+        '{% block title %}{{ block.super }}: лента{% endblock %}'
+        '{% block content %}'
+        '{% for name, text in posts %}'
+        '<p>{{ forloop.counter }}/{{ forloop.revcounter }} {{ name }}: '
+        '{% if text %}{{ text }}{% elif name %}пусто{% endif %}</p>'
+        '{% empty %}нет постов{% endfor %}'
+        '{% endblock %}'
+    ),
+}
+
+
+class IterTemplateTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.backend = DjangoTemplates({
+            'NAME': 'streaming', 'DIRS': [], 'APP_DIRS': False,
+            'OPTIONS': {'loaders': [
+                ('django.template.loaders.locmem.Loader', TEMPLATES),
+            ]},
+        })
+
+    def stream(self, context, min_size=0):
+        template = self.backend.get_template('page.html')
+        return list(buffered(iter_template(template, context, None), min_size))
+
+    def test_same_as_render(self):
+        """Проверяем, что потоковый рендер совпадает с обычным"""
+        template = self.backend.get_template('page.html')
+        for posts in ([('а', 'текст <b>'), ('б', '')], []):
+            with self.subTest(posts=posts):
+                self.assertEqual(
+                    ''.join(self.stream({'posts': posts})),
+                    template.render({'posts': posts}),
+                )
+
+    def test_flushes_blocks_and_iterations(self):
+        """Проверяем, что шапка и итерации цикла отдаются отдельно"""
+        chunks = self.stream({'posts': [('а', '1'), ('б', '2')]})
+        self.assertEqual(chunks[0], '<head>')
+        self.assertEqual(
+            chunks[-3:], ['<p>1/2 а: 1</p>', '<p>2/1 б: 2</p>', '</main>']
+        )
+
+    def test_small_chunks_merged(self):
+        """Проверяем, что куски меньше min_size склеиваются"""
+        chunks = self.stream({'posts': [('а', '1'), ('б', '2')]}, 1000)
+        self.assertEqual(len(chunks), 1)
+
+
+class StreamRenderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(5)
+        ])
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            text='Комментарий', post=cls.post, author=cls.user
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_pages_stream(self):
+        """Проверяем, что ленты и пост отдаются потоком с тем же HTML"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                expected = self.client.get(url).content.decode()
+                with override_settings(
+                    STREAMING_RENDER_ENABLED=True,
+                    STREAMING_RENDER_MIN_CHUNK=0,
+                ):
+                    response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                chunks = list(response.streaming_content)
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(
+                    CSRF_RE.sub('', b''.join(chunks).decode()),
+                    CSRF_RE.sub('', expected),
+                )
+
+    @override_settings(STREAMING_RENDER_ENABLED=True)
+    def test_csrf_cookie_set(self):
+        """Проверяем, что cookie CSRF выставляется до начала потока"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertIn('csrftoken', response.cookies)
+
+    @override_settings(
+        STREAMING_RENDER_ENABLED=True, RESPONSE_CACHE_ENABLED=True
+    )
+    def test_response_cache_stores_finished_stream(self):
+        """Проверяем, что анонимная лента идёт потоком и попадает в кеш"""
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        self.assertTrue(response.streaming)
+        self.assertNotIn('csrftoken', response.cookies)
+        content = b''.join(response.streaming_content)
+        cached = client.get(reverse('posts:index'))
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, content)
+
+    @override_settings(STREAMING_RENDER_ENABLED=True, PAGE_CACHE_ENABLED=True)
+    def test_page_cache_keeps_holes_in_stream(self):
+        """Проверяем, что из потока в кеш не попадают данные пользователя"""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIn('reader', b''.join(response.streaming_content).decode())
+        other = Client()
+        other.force_login(self.author)
+        cached = other.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertIn('author', cached.content.decode())
+        self.assertNotIn('reader', cached.content.decode())
+
+    @override_settings(
+        STREAMING_RENDER_ENABLED=True, STREAMING_RENDER_MIN_CHUNK=0,
+    )
+    def test_streamed_queries_measured(self):
+        """Проверяем, что запросы из потока попадают в метрики"""
+        def queries():
+            snapshot = metrics.db_queries.snapshot()
+            return snapshot.get(('posts:index',), (None, 0, 0))[1]
+
+        with override_settings(STREAMING_RENDER_ENABLED=False):
+            cache.clear()
+            before = queries()
+            self.client.get(reverse('posts:index'))
+            plain = queries() - before
+        cache.clear()
+        before = queries()
+        response = self.client.get(reverse('posts:index'))
+        list(response.streaming_content)
+        self.assertEqual(queries() - before, plain)
+
+    @override_settings(
+        STREAMING_RENDER_ENABLED=True, SLOW_QUERY_THRESHOLD=0,
+    )
+    def test_streamed_queries_logged(self):
+        """Проверяем, что медленные запросы из потока пишутся в журнал"""
+        response = self.client.get(reverse('posts:index'))
+        with self.assertLogs('yatube.slow_queries') as logs:
+            list(response.streaming_content)
+        self.assertTrue(logs.records)
+
+    @override_settings(
+        STREAMING_RENDER_ENABLED=True, STREAMING_RENDER_MIN_CHUNK=0,
+        RESPONSE_CACHE_ENABLED=True,
+    )
+    def test_error_mid_stream(self):
+        """Проверяем, что ошибка посреди потока видна и не кешируется"""
+        def failing(node, context):
+            if node.name == 'content':
+                raise RuntimeError('сбой рендеринга')
+            yield from iter_block(node, context)
+
+        received = []
+
+        def receiver(sender, request, **kwargs):
+            received.append(request.path)
+
+        got_request_exception.connect(receiver)
+        self.addCleanup(got_request_exception.disconnect, receiver)
+        url = reverse('posts:index')
+        client = Client()
+        with mock.patch.dict(HANDLERS, {BlockNode: failing}):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            chunks = response.streaming_content
+            self.assertIn(b'<head', next(chunks))
+            with self.assertLogs('django.request', 'ERROR'):
+                with self.assertRaises(RuntimeError):
+                    list(chunks)
+        self.assertEqual(received, [url])
+        response = client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIn('Пост 0', b''.join(response.streaming_content).decode())
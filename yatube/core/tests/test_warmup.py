@@ -0,0 +1,36 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from ..warmup import compile_templates, django_backends, iter_template_names
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_project_templates_found(self):
+        """Проверяем, что прогрев видит шаблоны проекта"""
+        names = set(iter_template_names(django_backends()[0]))
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/header.html', names)
+
+    def test_all_templates_compile(self):
+        """Проверяем, что все шаблоны компилируются без ошибок"""
+        self.assertEqual(compile_templates(), {})
+
+
+class CompileTemplatesCommandTest(SimpleTestCase):
+    def test_broken_template_fails_build(self):
+        """Проверяем, что ошибка синтаксиса шаблона прерывает сборку"""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as file:
+                file.write('{% if %}')
+            templates = [{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [directory],
+            }]
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaises(CommandError):
+                    call_command('compiletemplates', stderr=io.StringIO())
@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
 from http import HTTPStatus
 
+from . import slow_queries
+from .metrics import REGISTRY
+
 
 def page_not_found(request, exception):
     return render(
@@ -34,3 +41,23 @@ def csrf_failure(request, reason=''):
         'core/403csrf.html',
         status=HTTPStatus.FORBIDDEN
     )
+
+
+def metrics(request):
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def slow_queries_admin(request):
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Медленные запросы',
+        'entries': slow_queries.recent(settings.SLOW_QUERY_ADMIN_LIMIT),
+        'threshold': settings.SLOW_QUERY_THRESHOLD,
+    }
+    return render(request, 'core/slow_queries.html', context)
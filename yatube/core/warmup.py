@@ -0,0 +1,92 @@
+import os
+from time import perf_counter
+
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+from django.utils.functional import empty
+
+
+def template_dirs(engine):
+    """Каталоги всех загрузчиков движка, включая вложенные в cached."""
+    dirs = []
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            if hasattr(inner, 'get_dirs'):
+                dirs.extend(inner.get_dirs())
+    return dirs
+
+
+def iter_template_names(backend):
+    """Имена всех шаблонов, доступных движку Django Templates."""
+    seen = set()
+    for directory in template_dirs(backend.engine):
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def django_backends():
+    return [
+        backend for backend in engines.all()
+        if isinstance(backend, DjangoTemplates)
+    ]
+
+
+def compile_templates():
+    """Компилирует все шаблоны, возвращает {имя: исключение} для ошибок."""
+    errors = {}
+    for backend in django_backends():
+        for name in iter_template_names(backend):
+            try:
+                backend.get_template(name)
+            except Exception as exc:
+                errors[name] = exc
+    return errors
+
+
+def populate_urls():
+    resolver = get_resolver()
+    # Свойство заполняет кеши reverse() и импортирует все представления.
+    resolver.reverse_dict
+    return resolver
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def load_thumbnail_engine():
+    """Создаёт ленивые объекты sorl-thumbnail (движок PIL, хранилище)."""
+    from sorl.thumbnail import default
+
+    for lazy in (default.backend, default.kvstore, default.engine,
+                 default.storage):
+        if lazy._wrapped is empty:
+            lazy._setup()
+
+
+STEPS = (
+    ('urls', populate_urls),
+    ('thumbnail', load_thumbnail_engine),
+    ('templates', compile_templates),
+    ('database', open_connections),
+)
+
+
+def warm_up():
+    """Прогревает воркер до первого запроса, возвращает время шагов."""
+    timings = {}
+    for name, step in STEPS:
+        start = perf_counter()
+        step()
+        timings[name] = perf_counter() - start
+    return timings
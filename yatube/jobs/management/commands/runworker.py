@@ -0,0 +1,46 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import run_pool, work
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди в БД. С --processes больше '
+        'одного запускает пул процессов; с --once выходит, когда '
+        'готовых задач не осталось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-обработчиков.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=None,
+            help='Пауза между опросами пустой очереди, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        if options['processes'] > 1:
+            codes = run_pool(
+                options['processes'], options['once'], options['poll']
+            )
+            failed = sum(1 for code in codes if code)
+            self.stdout.write(
+                f'Обработчиков завершилось с ошибкой: {failed}'
+            )
+            return
+        progress = self.stdout.write if options['verbosity'] > 1 else None
+        done = work(
+            once=options['once'], poll=options['poll'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Задач выполнено: {done} за {perf_counter() - start:.1f} с'
+        ))
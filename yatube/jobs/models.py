@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы (JSON)', default='{}')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED,
+    )
+    priority = models.SmallIntegerField(
+        'Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше',
+    )
+    run_at = models.DateTimeField('Выполнить не раньше', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
+
+    class Meta:
+        ordering = ('-priority', 'run_at', 'pk')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'), name='jobs_job_due_idx'
+            ),
+        )
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
@@ -0,0 +1,138 @@
+import json
+import traceback
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import metrics
+
+from .models import Job
+from .registry import get_task
+
+jobs_total = metrics.REGISTRY.counter(
+    'yatube_jobs_total',
+    'Background job runs by task and outcome.',
+    ('task', 'outcome'),
+)
+job_duration = metrics.REGISTRY.histogram(
+    'yatube_job_seconds',
+    'Background job run time by task.',
+    ('task',),
+)
+
+
+def enqueue(task, payload=None, priority=0, run_at=None, key=None,
+            max_attempts=None):
+    """Ставит задачу в очередь и возвращает её запись.
+
+    Повторная постановка с тем же ключом идемпотентности возвращает
+    уже существующую задачу, в каком бы статусе она ни была.
+    """
+    registered = get_task(task)
+    if key is not None:
+        existing = Job.objects.filter(key=key).first()
+        if existing is not None:
+            return existing
+    job = Job(
+        task=task,
+        payload=json.dumps(payload or {}, cls=DjangoJSONEncoder),
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        key=key,
+        max_attempts=(
+            max_attempts or registered.max_attempts
+            or settings.JOBS_MAX_ATTEMPTS
+        ),
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        if key is None:
+            raise
+        return Job.objects.get(key=key)
+    return job
+
+
+def claim(worker):
+    """Забирает одну готовую к запуску задачу или возвращает None.
+
+    Кандидаты читаются без блокировок, а захват — условный UPDATE:
+    из конкурирующих обработчиков строку обновит ровно один, остальные
+    получат 0 и попробуют следующего кандидата.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).values_list('pk', flat=True)[:settings.JOBS_CLAIM_BATCH]
+    for pk in list(candidates):
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_DELAY,
+    ))
+
+
+def run(job):
+    """Выполняет захваченную задачу и записывает результат.
+
+    Упавшая задача возвращается в очередь с экспоненциальной задержкой,
+    пока не исчерпаны попытки.
+    """
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    start = perf_counter()
+    try:
+        get_task(job.task)(**json.loads(job.payload))
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            outcome = 'retry'
+            owned.update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + retry_delay(job.attempts),
+                last_error=error,
+                locked_by='',
+            )
+        else:
+            outcome = 'failed'
+            owned.update(
+                status=Job.FAILED, finished=timezone.now(), last_error=error
+            )
+    else:
+        outcome = 'done'
+        owned.update(status=Job.DONE, finished=timezone.now())
+    job_duration.observe(perf_counter() - start, task=job.task)
+    jobs_total.inc(task=job.task, outcome=outcome)
+    return outcome
+
+
+def release_stale():
+    """Возвращает в очередь задачи упавших обработчиков."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT
+        ),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        finished=timezone.now(),
+        last_error='Обработчик не завершил задачу',
+    )
+    return failed + stale.update(status=Job.QUEUED, locked_by='')
@@ -0,0 +1,41 @@
+TASKS = {}
+
+
+class Task:
+    """Зарегистрированная функция фоновой задачи."""
+
+    def __init__(self, func, name, max_attempts=None):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **options):
+        """Ставит задачу в очередь; аргументы задачи — в payload."""
+        from .queue import enqueue
+
+        return enqueue(self.name, **options)
+
+
+def task(name=None, max_attempts=None):
+    """Регистрирует функцию как задачу по имени (по умолчанию — app.func).
+
+    Модули tasks.py приложений импортируются в JobsConfig.ready,
+    поэтому обработчик знает все задачи без отдельного списка.
+    """
+    def decorator(func):
+        label = name or f'{func.__module__.split(".")[0]}.{func.__name__}'
+        if label in TASKS:
+            raise ValueError(f'Задача {label} уже зарегистрирована')
+        TASKS[label] = Task(func, label, max_attempts)
+        return TASKS[label]
+    return decorator
+
+
+def get_task(name):
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f'Неизвестная задача: {name}') from None
@@ -0,0 +1,126 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Job
+from ..queue import claim, enqueue, release_stale, run
+from ..registry import task
+
+CALLS = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@task(name='jobs.tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('сломано')
+
+
+@override_settings(JOBS_RETRY_BACKOFF=30, JOBS_RETRY_MAX_DELAY=3600)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def run_worker(self):
+        call_command('runworker', '--once', stdout=io.StringIO())
+
+    def test_runworker_executes_jobs(self):
+        """Проверяем, что обработчик выполняет задачу с аргументами"""
+        job = record.enqueue(payload={'value': 'раз'})
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(CALLS, ['раз'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished)
+
+    def test_priority_and_schedule(self):
+        """Проверяем порядок по приоритету и отложенный запуск"""
+        enqueue('jobs.tests.record', {'value': 'обычная'})
+        enqueue('jobs.tests.record', {'value': 'срочная'}, priority=5)
+        later = enqueue(
+            'jobs.tests.record', {'value': 'позже'},
+            run_at=timezone.now() + timedelta(hours=1),
+        )
+        self.run_worker()
+        self.assertEqual(CALLS, ['срочная', 'обычная'])
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_idempotency_key(self):
+        """Проверяем, что задача с тем же ключом ставится один раз"""
+        first = record.enqueue(payload={'value': 1}, key='единственная')
+        second = record.enqueue(payload={'value': 2}, key='единственная')
+        self.assertEqual(first.pk, second.pk)
+        self.run_worker()
+        record.enqueue(payload={'value': 3}, key='единственная')
+        self.run_worker()
+        self.assertEqual(CALLS, [1])
+
+    def test_claim_is_exclusive(self):
+        """Проверяем, что захваченную задачу не получит другой обработчик"""
+        record.enqueue(payload={'value': 1})
+        job = claim('первый')
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.locked_by, 'первый')
+        self.assertIsNone(claim('второй'))
+
+    def test_retry_with_backoff(self):
+        """Проверяем повтор с задержкой и ошибку после всех попыток"""
+        job = broken.enqueue()
+        self.assertEqual(run(claim('w')), 'retry')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('сломано', job.last_error)
+        delay = job.run_at - timezone.now()
+        self.assertTrue(timedelta(seconds=25) < delay <= timedelta(seconds=30))
+        self.assertIsNone(claim('w'))
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(run(claim('w')), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_release_stale(self):
+        """Проверяем, что брошенная задача возвращается в очередь"""
+        job = record.enqueue(payload={'value': 1})
+        claim('умерший')
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(release_stale(), 1)
+        self.run_worker()
+        self.assertEqual(CALLS, [1])
+
+    def test_unknown_task(self):
+        """Проверяем, что нельзя поставить незарегистрированную задачу"""
+        with self.assertRaises(LookupError):
+            enqueue('jobs.tests.missing')
+
+
+class ThumbnailJobTests(TestCase):
+    def test_warm_thumbnails(self):
+        """Проверяем, что задача строит миниатюру картинки поста"""
+        from posts.models import Post, User
+        from posts.tasks import THUMBNAIL_GEOMETRY, schedule_thumbnails
+
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(
+            text='С картинкой', author=author, image='posts/small.gif'
+        )
+        schedule_thumbnails(post)
+        schedule_thumbnails(post)
+        self.assertEqual(Job.objects.count(), 1)
+        with mock.patch('posts.tasks.get_thumbnail') as get_thumbnail:
+            call_command('runworker', '--once', stdout=io.StringIO())
+        get_thumbnail.assert_called_once_with(
+            post.image, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+        )
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+import django
+from django.conf import settings
+from django.db import connections
+
+from .queue import claim, release_stale, run
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(once=False, poll=None, stop=None, progress=None):
+    """Цикл обработчика: берёт задачи по одной, пока не велено остановиться.
+
+    Без задач спит poll секунд и заодно возвращает в очередь задачи
+    обработчиков, умерших посреди работы. С once выходит, как только
+    очередь опустела. Возвращает число выполненных задач.
+    """
+    poll = settings.JOBS_POLL_INTERVAL if poll is None else poll
+    stop = stop or threading.Event()
+    name = worker_name()
+    done = 0
+    while not stop.is_set():
+        job = claim(name)
+        if job is None:
+            if once:
+                break
+            release_stale()
+            stop.wait(poll)
+            continue
+        outcome = run(job)
+        done += 1
+        if progress:
+            progress(f'{job}: {outcome}')
+    return done
+
+
+def child(once, poll, stop):
+    django.setup()
+    # Ctrl+C приходит всей группе процессов: дочерний доделывает
+    # текущую задачу и выходит вместе с родителем.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    work(once=once, poll=poll, stop=stop)
+    connections.close_all()
+
+
+def run_pool(processes, once=False, poll=None):
+    """Запускает processes обработчиков и ждёт их завершения.
+
+    Соединения с БД закрываются до fork, чтобы дочерние процессы
+    открыли свои, а не делили сокет родителя.
+    """
+    connections.close_all()
+    stop = multiprocessing.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    pool = [
+        multiprocessing.Process(target=child, args=(once, poll, stop))
+        for _ in range(processes)
+    ]
+    for process in pool:
+        process.start()
+    for process in pool:
+        process.join()
+    return [process.exitcode for process in pool]
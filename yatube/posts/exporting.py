@@ -0,0 +1,160 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Comment, Follow, Post
+
+# Колонки совпадают с форматом import_posts: выгрузку можно загрузить
+# обратно. Первое поле — pk, по нему идёт постраничный обход.
+EXPORTS = {
+    'post': (Post, (
+        ('id', 'pk'), ('text', 'text'), ('author', 'author__username'),
+        ('group', 'group__slug'), ('pub_date', 'pub_date'),
+        ('image', 'image'),
+    ), 'pub_date'),
+    'comment': (Comment, (
+        ('id', 'pk'), ('post', 'post_id'), ('text', 'text'),
+        ('author', 'author__username'), ('created', 'created'),
+    ), 'created'),
+    'follow': (Follow, (
+        ('id', 'pk'), ('user', 'user__username'),
+        ('author', 'author__username'),
+    ), None),
+}
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+OUTPUT_CHUNK = 64 * 1024
+
+
+class ExportError(ValueError):
+    """Неверные параметры выгрузки."""
+
+
+def parse_day(value, name):
+    day = parse_date(value)
+    if day is None:
+        raise ExportError(f'{name}: ожидается дата ГГГГ-ММ-ДД')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(model, author=None, group=None, since=None, until=None):
+    """Queryset выгрузки с фильтрами по автору, группе и датам.
+
+    Границы since и until — даты включительно.
+    """
+    if model not in EXPORTS:
+        raise ExportError(f'Неизвестная модель: {model}')
+    model_class, _, date_field = EXPORTS[model]
+    queryset = model_class.objects.all()
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if group:
+        if model_class is Follow:
+            raise ExportError('Подписки не фильтруются по группе')
+        lookup = 'group__slug' if model_class is Post else 'post__group__slug'
+        queryset = queryset.filter(**{lookup: group})
+    if (since or until) and date_field is None:
+        raise ExportError('Подписки не фильтруются по дате')
+    if since:
+        queryset = queryset.filter(**{
+            f'{date_field}__gte': parse_day(since, 'since')
+        })
+    if until:
+        queryset = queryset.filter(**{
+            f'{date_field}__lt': parse_day(until, 'until') + timedelta(days=1)
+        })
+    return queryset
+
+
+def iter_rows(queryset, lookups, chunk_size=2000):
+    """Обходит таблицу по pk: WHERE pk > последний ORDER BY pk LIMIT n.
+
+    В отличие от OFFSET, каждая страница читается по индексу
+    за одно и то же время, а iterator() не копит строки в кеше
+    queryset, поэтому память не растёт с размером таблицы.
+    """
+    last = 0
+    while True:
+        page = (
+            queryset.filter(pk__gt=last).order_by('pk')
+            .values_list(*lookups)[:chunk_size]
+        )
+        count = 0
+        for row in page.iterator(chunk_size=chunk_size):
+            count += 1
+            last = row[0]
+            yield row
+        if count < chunk_size:
+            return
+
+
+def jsonl_lines(names, rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(names, row)), ensure_ascii=False, cls=DjangoJSONEncoder
+        ) + '\n'
+
+
+class _Line:
+    """Буфер для csv.writer: writerow возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(names, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ])
+
+
+def encode(lines):
+    """Склеивает строки в куски около OUTPUT_CHUNK байт."""
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= OUTPUT_CHUNK:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(model, file_format='jsonl', compress=False, chunk_size=2000,
+           **filters):
+    """Генератор байтов выгрузки модели в JSONL или CSV."""
+    if file_format not in FORMATS:
+        raise ExportError(f'Неизвестный формат: {file_format}')
+    queryset = export_queryset(model, **filters)
+    names, lookups = zip(*EXPORTS[model][1])
+    rows = iter_rows(queryset, lookups, chunk_size)
+    lines = (jsonl_lines if file_format == 'jsonl' else csv_lines)(
+        names, rows
+    )
+    chunks = encode(lines)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def filename(model, file_format, compress):
+    return f'{model}s.{file_format}' + ('.gz' if compress else '')
@@ -0,0 +1,157 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import quote_etag
+
+from core import surrogate
+from core.surrogate import add_surrogate_keys
+
+from .lookups import groups, users
+from .models import Post
+
+FEED_ITEMS = 20
+
+
+class PostsFeed(Feed):
+    """Лента последних постов сайта."""
+    title = 'Последние обновления на сайте'
+    description = 'Новые посты всех авторов Yatube'
+
+    def get_object(self, request, *args, **kwargs):
+        add_surrogate_keys(request, 'posts')
+        return None
+
+    def link(self):
+        return reverse('posts:index')
+
+    def get_queryset(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_queryset(obj).select_related(
+            'author', 'group'
+        )[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.text[:50]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group_id else []
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        group = groups.get_or_404(slug)
+        add_surrogate_keys(request, f'group-{group.pk}')
+        return group
+
+    def title(self, obj):
+        return f'Записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def get_queryset(self, obj):
+        return obj.posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        author = users.get_or_404(username)
+        add_surrogate_keys(request, f'author-{author.pk}')
+        return author
+
+    def title(self, obj):
+        return f'Посты пользователя {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def get_queryset(self, obj):
+        return obj.posts.all()
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def cached_feed(feed):
+    """Отдаёт ленту из кеша и отвечает 304 на условные запросы.
+
+    Документ сбрасывается по суррогатным ключам ленты (posts,
+    group-<id>, author-<id>), то есть при сохранении поста.
+    Повторный опрос читалкой не обращается к базе.
+
+    Условные запросы — только по ETag от содержимого: Last-Modified
+    по самому свежему pub_date не меняется при правке или удалении
+    поста и давал бы устаревший 304.
+    """
+    def view(request, *args, **kwargs):
+        key = 'feed:' + hashlib.md5(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        cached = surrogate.fetch(key)
+        if cached is None:
+            started = surrogate.start()
+            response = feed(request, *args, **kwargs)
+            keys = surrogate.surrogate_keys(request)
+            cached = (
+                response.content, response['Content-Type'],
+                quote_etag(hashlib.md5(response.content).hexdigest()),
+                keys,
+            )
+            surrogate.store(
+                key, cached, keys, settings.FEED_CACHE_TIMEOUT, started
+            )
+        content, content_type, etag, keys = cached
+        add_surrogate_keys(request, *keys)
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return get_conditional_response(request, etag=etag, response=response)
+    return view
+
+
+posts_rss = cached_feed(PostsFeed())
+posts_atom = cached_feed(PostsAtomFeed())
+group_rss = cached_feed(GroupFeed())
+group_atom = cached_feed(GroupAtomFeed())
+author_rss = cached_feed(AuthorFeed())
+author_atom = cached_feed(AuthorAtomFeed())
@@ -0,0 +1,20 @@
+from core.holes import hole_context
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@hole_context('posts/includes/follow_button.html')
+def follow_button(request, username):
+    user = request.user
+    return {
+        'following': user.is_authenticated and Follow.objects.filter(
+            user=user,
+            author__username=username
+        ).exists()
+    }
+
+
+@hole_context('posts/includes/post_actions.html')
+def post_actions(request, post_id, author_id):
+    return {'form': CommentForm()}
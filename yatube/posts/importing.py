@@ -0,0 +1,325 @@
+import csv
+import json
+import os
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.surrogate import purge
+
+from .models import Comment, Group, Post, User
+from .seeding import chunked, explicit_dates
+from .sitemaps import mark_dirty, shards_between, shards_for
+
+
+class SkipRow(Exception):
+    """Строку нельзя импортировать; текст исключения — причина."""
+
+
+class LineReader:
+    """Построчно читает бинарный файл и помнит смещение в байтах.
+
+    csv.reader забирает строки по одной и только сколько нужно
+    для очередной записи, поэтому после каждой записи position
+    указывает ровно на её конец, даже если в тексте есть переводы строк.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.position = source.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.source.readline()
+        if not line:
+            raise StopIteration
+        encoding = 'utf-8-sig' if self.position == 0 else 'utf-8'
+        self.position += len(line)
+        return line.decode(encoding)
+
+    def seek(self, offset):
+        self.source.seek(offset)
+        self.position = offset
+
+
+def read_jsonl(source, offset):
+    source.seek(offset)
+    position = offset
+    for line in source:
+        position += len(line)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record, position
+
+
+def read_csv(source, offset):
+    lines = LineReader(source)
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    if offset > lines.position:
+        lines.seek(offset)
+    for row in reader:
+        yield row, lines.position
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def read_records(path, file_format, offset=0):
+    """Генератор пар (запись, смещение её конца в файле)."""
+    with open(path, 'rb') as source:
+        yield from READERS[file_format](source, offset)
+
+
+class Checkpoint:
+    """Смещение последней записанной пачки для продолжения импорта.
+
+    Файл заменяется атомарно через os.replace, поэтому после сбоя
+    в нём всегда целое состояние.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding='utf-8') as source:
+            return json.load(source)
+
+    def save(self, state):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as output:
+            json.dump(state, output)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise SkipRow('дата')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def parse_id(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise SkipRow('id')
+
+
+class Importer:
+    """Потоковый импорт постов или комментариев со старой платформы.
+
+    Авторы и группы сопоставляются по username и slug через словари
+    в памяти. Записи пишутся пачками bulk_create, каждая пачка
+    в своей транзакции. Старые id сохраняются как pk, а конфликты
+    игнорируются, поэтому повторный прогон пачки безопасен.
+    """
+
+    def __init__(self, model, batch_size=1000, chunk_size=10000,
+                 create_missing=False, progress=None):
+        self.model = {'post': Post, 'comment': Comment}[model]
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.create_missing = create_missing
+        self.progress = progress or (lambda offset, stats: None)
+        self.stats = Counter()
+        self.auto_range = None
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = (
+            dict(Group.objects.values_list('slug', 'pk'))
+            if self.model is Post else {}
+        )
+
+    def run(self, records, checkpoint=None, state=None):
+        if state:
+            self.stats.update(state.get('stats', {}))
+        date_field = 'pub_date' if self.model is Post else 'created'
+        for chunk in chunked(records, self.chunk_size):
+            with explicit_dates(self.model, date_field):
+                with transaction.atomic():
+                    objects = self.build([record for record, _ in chunk])
+                    inserted = self.insert(objects)
+            self.stats['записано'] += inserted
+            if inserted < len(objects):
+                self.stats['пропущено (уже есть)'] += len(objects) - inserted
+            offset = chunk[-1][1]
+            if checkpoint is not None:
+                checkpoint.save({
+                    'model': self.model._meta.model_name,
+                    'offset': offset,
+                    'stats': dict(self.stats),
+                })
+            self.purge(objects)
+            self.mark_sitemaps(objects)
+            self.progress(offset, self.stats)
+        self.reset_sequence()
+        return self.stats
+
+    def insert(self, objects):
+        """Пишет пачку и возвращает число действительно новых строк.
+
+        ignore_conflicts молча отбрасывает строки с занятым pk (в том
+        числе при повторе пачки после сбоя), поэтому новые считаются
+        по pk, которых не было в базе до вставки.
+        """
+        pks = {obj.pk for obj in objects if obj.pk is not None}
+        existing = set(self.model.objects.filter(
+            pk__in=pks
+        ).values_list('pk', flat=True)) if pks else set()
+        auto = sum(obj.pk is None for obj in objects)
+        last = self.last_pk() if auto else 0
+        self.model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True,
+        )
+        # SQLite не возвращает pk из bulk_create: строки без id
+        # получают pk после прежнего максимума.
+        self.auto_range = (last + 1, self.last_pk()) if auto else None
+        return len(pks - existing) + auto
+
+    def last_pk(self):
+        return self.model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+    def build(self, records):
+        self.resolve_missing(records)
+        objects = []
+        for record in records:
+            try:
+                if not isinstance(record, dict):
+                    raise SkipRow('формат')
+                objects.append(self.build_object(record))
+            except SkipRow as reason:
+                self.stats[f'пропущено ({reason})'] += 1
+        if self.model is Comment:
+            objects = self.existing_posts_only(objects)
+        return objects
+
+    def build_object(self, record):
+        text = record.get('text')
+        if not text:
+            raise SkipRow('текст')
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            raise SkipRow('автор')
+        if self.model is Comment:
+            post_id = parse_id(record.get('post'))
+            if post_id is None:
+                raise SkipRow('пост')
+            return Comment(
+                pk=parse_id(record.get('id')), text=text,
+                author_id=author_id, post_id=post_id,
+                created=parse_date(record.get('created')),
+            )
+        slug = record.get('group') or None
+        group_id = self.groups.get(slug)
+        if slug is not None and group_id is None:
+            raise SkipRow('группа')
+        return Post(
+            pk=parse_id(record.get('id')), text=text,
+            author_id=author_id, group_id=group_id,
+            pub_date=parse_date(record.get('pub_date')),
+            image=record.get('image') or '',
+        )
+
+    def resolve_missing(self, records):
+        """С --create-missing создаёт неизвестных авторов и группы."""
+        if not self.create_missing:
+            return
+        records = [record for record in records if isinstance(record, dict)]
+        usernames = {
+            record.get('author') for record in records
+        } - set(self.authors) - {None, ''}
+        if usernames:
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in usernames],
+                ignore_conflicts=True,
+            )
+            self.authors.update(User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+        if self.model is not Post:
+            return
+        slugs = {
+            record.get('group') for record in records
+        } - set(self.groups) - {None, ''}
+        if slugs:
+            Group.objects.bulk_create(
+                [Group(title=slug, slug=slug, description='')
+                 for slug in slugs],
+                ignore_conflicts=True,
+            )
+            self.groups.update(Group.objects.filter(
+                slug__in=slugs
+            ).values_list('slug', 'pk'))
+
+    def existing_posts_only(self, comments):
+        post_ids = {comment.post_id for comment in comments}
+        existing = set(Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('pk', flat=True))
+        kept = [
+            comment for comment in comments if comment.post_id in existing
+        ]
+        if len(kept) < len(comments):
+            self.stats['пропущено (пост)'] += len(comments) - len(kept)
+        return kept
+
+    def purge(self, objects):
+        """bulk_create не шлёт сигналы: сбрасываем кеш страниц сами."""
+        if self.model is Comment:
+            purge(*{f'post-{comment.post_id}' for comment in objects})
+            return
+        keys = {'posts'}
+        for post in objects:
+            keys.add(f'author-{post.author_id}')
+            if post.group_id:
+                keys.add(f'group-{post.group_id}')
+        purge(*keys)
+
+    def mark_sitemaps(self, objects):
+        """bulk_create не шлёт сигналы: помечаем шарды карты сайта сами."""
+        if self.model is not Post:
+            return
+        names = shards_for('posts', (post.pk for post in objects))
+        if self.auto_range is not None:
+            names |= shards_between('posts', *self.auto_range)
+        names |= shards_for('profiles', {post.author_id for post in objects})
+        names |= shards_for('groups', {post.group_id for post in objects})
+        mark_dirty(*names)
+
+    def reset_sequence(self):
+        """После вставки явных pk последовательность (PostgreSQL) отстаёт."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [self.model]
+        )
+        if not statements:
+            return
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
@@ -0,0 +1,6 @@
+from core.lookup import TwoTierLookup
+
+from .models import Group, User
+
+groups = TwoTierLookup(Group, 'slug')
+users = TwoTierLookup(User, 'username')
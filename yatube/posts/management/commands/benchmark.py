@@ -0,0 +1,244 @@
+import json
+import os
+import tracemalloc
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.middleware.compression import available_codings
+from posts import urls
+from posts.models import Comment, Follow, Group, Post, User
+from posts.seeding import Seeder
+
+# Как вызывать каждый маршрут из posts/urls.py: метод, авторизация,
+# функция, строящая аргументы по подготовленным данным.
+ROUTES = {
+    'index': ('get', False, lambda data: {}),
+    'group_list': ('get', False, lambda data: {'slug': data['group'].slug}),
+    'profile': ('get', False, lambda data: {
+        'username': data['author'].username
+    }),
+    'post_detail': ('get', False, lambda data: {
+        'post_id': data['post'].pk
+    }),
+    'post_edit': ('get', True, lambda data: {'post_id': data['own_post'].pk}),
+    'post_create': ('get', True, lambda data: {}),
+    'add_comment': ('post', True, lambda data: {
+        'post_id': data['post'].pk
+    }),
+    'follow_index': ('get', True, lambda data: {}),
+    'profile_follow': ('get', True, lambda data: {
+        'username': data['author'].username
+    }),
+    'profile_unfollow': ('get', True, lambda data: {
+        'username': data['author'].username
+    }),
+    'feed_rss': ('get', False, lambda data: {}),
+    'feed_atom': ('get', False, lambda data: {}),
+    'group_feed_rss': ('get', False, lambda data: {
+        'slug': data['group'].slug
+    }),
+    'group_feed_atom': ('get', False, lambda data: {
+        'slug': data['group'].slug
+    }),
+    'profile_feed_rss': ('get', False, lambda data: {
+        'username': data['author'].username
+    }),
+    'profile_feed_atom': ('get', False, lambda data: {
+        'username': data['author'].username
+    }),
+}
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(settings.BASE_DIR), 'benchmarks', 'baseline.json'
+)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, число запросов к БД и пик памяти для всех '
+        'маршрутов posts на синтетических данных заданного объёма '
+        'и сравнивает результат с базовой линией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', nargs='+', type=int,
+            default=[10000, 100000, 1000000],
+            help='Число постов для каждого прогона.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число замеряемых запросов на маршрут.'
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новую базовую линию.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно базовой линии.'
+        )
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        missing = {
+            pattern.name for pattern in urls.urlpatterns
+        } - set(ROUTES)
+        if missing:
+            raise CommandError(
+                f'Нет сценария для маршрутов: {", ".join(sorted(missing))}'
+            )
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = {}
+            for scale in options['scales']:
+                self.stdout.write(f'Подготовка данных: {scale} постов')
+                data = self.seed(scale, options['seed'])
+                results[str(scale)] = self.run_routes(
+                    data, options['requests']
+                )
+                self.report(scale, results[str(scale)])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            self.dump(options['output'], results)
+        if options['save_baseline']:
+            self.dump(options['baseline'], results)
+            return
+        regressions = self.compare(
+            results, options['baseline'], options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+
+    def seed(self, scale, seed):
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+        seeder = Seeder(seed=seed)
+        seeder.users(max(scale // 20, 10))
+        seeder.groups(max(scale // 5000, 5))
+        seeder.follows(10)
+        seeder.posts(scale)
+        seeder.comments(scale * 2)
+        user_ids = seeder.user_ids
+        reader = User.objects.get(pk=user_ids[-1])
+        author = User.objects.get(pk=user_ids[0])
+        return {
+            'reader': reader,
+            'author': author,
+            'group': Group.objects.first(),
+            'post': Post.objects.filter(author=author).first(),
+            'own_post': Post.objects.create(text='Свой пост', author=reader),
+        }
+
+    def run_routes(self, data, requests):
+        anonymous = Client()
+        authorized = Client()
+        authorized.force_login(data['reader'])
+        results = {}
+        for name, (method, login, kwargs) in ROUTES.items():
+            url = reverse(f'posts:{name}', kwargs=kwargs(data))
+            client = authorized if login else anonymous
+            request = getattr(client, method)
+            payload = {'text': 'Комментарий'} if method == 'post' else {}
+            cache.clear()
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                request(url, payload)
+            query_count = len(queries)
+            tracemalloc.start()
+            request(url, payload)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            sizes = self.measure_sizes(request, url, payload, method)
+            timings = []
+            for _ in range(requests):
+                start = perf_counter()
+                request(url, payload)
+                timings.append(perf_counter() - start)
+            results[name] = {
+                'p50': percentile(timings, 0.50),
+                'p95': percentile(timings, 0.95),
+                'p99': percentile(timings, 0.99),
+                'queries': query_count,
+                'peak_kb': round(peak / 1024, 1),
+                **sizes,
+            }
+        return results
+
+    @staticmethod
+    def measure_sizes(request, url, payload, method):
+        """Размер страницы без сжатия и в каждой доступной кодировке."""
+        if method != 'get':
+            return {}
+        sizes = {'kb': round(len(request(url).content) / 1024, 1)}
+        for coding in available_codings():
+            response = request(url, HTTP_ACCEPT_ENCODING=coding)
+            sizes[f'{coding}_kb'] = round(len(response.content) / 1024, 1)
+        return sizes
+
+    def report(self, scale, results):
+        self.stdout.write(
+            f'{"маршрут":<18}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+            f'{"запросы":>10}{"пик, КБ":>12}{"КБ":>9}{"gzip, КБ":>10}'
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<18}{row["p50"] * 1000:>10.2f}'
+                f'{row["p95"] * 1000:>10.2f}{row["p99"] * 1000:>10.2f}'
+                f'{row["queries"]:>10}{row["peak_kb"]:>12}'
+                f'{row.get("kb", "-"):>9}{row.get("gzip_kb", "-"):>10}'
+            )
+
+    @staticmethod
+    def dump(path, results):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    def compare(self, results, path, tolerance):
+        if not os.path.exists(path):
+            self.stdout.write(f'Базовая линия {path} не найдена')
+            return []
+        with open(path, encoding='utf-8') as source:
+            baseline = json.load(source)
+        regressions = []
+        for scale, routes in results.items():
+            for name, row in routes.items():
+                base = baseline.get(scale, {}).get(name)
+                if base is None:
+                    continue
+                if row['p95'] > base['p95'] * (1 + tolerance):
+                    regressions.append(
+                        f'{scale}/{name}: p95 {row["p95"] * 1000:.2f} мс '
+                        f'против {base["p95"] * 1000:.2f} мс'
+                    )
+                if row['queries'] > base['queries']:
+                    regressions.append(
+                        f'{scale}/{name}: запросов {row["queries"]} '
+                        f'против {base["queries"]}'
+                    )
+        return regressions
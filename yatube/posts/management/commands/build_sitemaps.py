@@ -0,0 +1,28 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает шарды карты сайта, помеченные сигналами как '
+        'изменённые, и индекс sitemap.xml. Запускается по расписанию; '
+        'первый запуск или --all собирает все шарды.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересобрать все шарды, а не только изменённые.'
+        )
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        progress = self.stdout.write if options['verbosity'] > 1 else None
+        names = build(full=options['all'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Шардов пересобрано: {len(names)} '
+            f'за {perf_counter() - start:.1f} с'
+        ))
@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import FORMATS, ExportError, export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты, комментарии или подписки в JSONL '
+        'или CSV, при необходимости со сжатием gzip. Память не зависит '
+        'от размера таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=('post', 'comment', 'follow'),
+            default='post',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--author', help='username автора.')
+        parser.add_argument('--group', help='slug группы.')
+        parser.add_argument('--since', help='С даты ГГГГ-ММ-ДД.')
+        parser.add_argument('--until', help='По дату ГГГГ-ММ-ДД включительно.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Строк в одном запросе к БД.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chunks = export(
+                options['model'], options['format'], options['gzip'],
+                chunk_size=options['chunk_size'],
+                author=options['author'], group=options['group'],
+                since=options['since'], until=options['until'],
+            )
+        except ExportError as exc:
+            raise CommandError(exc)
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                self.write(chunks, output)
+        else:
+            self.write(chunks, sys.stdout.buffer)
+
+    @staticmethod
+    def write(chunks, output):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
@@ -0,0 +1,102 @@
+import os
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import Checkpoint, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты или комментарии из JSONL или CSV. '
+        'Авторы ищутся по username, группы — по slug, старые id '
+        'сохраняются. Прерванный импорт продолжается с контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv.')
+        parser.add_argument(
+            '--model', choices=('post', 'comment'), default='post',
+            help='Что содержит файл: посты или комментарии.'
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла; по умолчанию — по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Строк в одной транзакции и между контрольными точками.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; по умолчанию <path>.checkpoint.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, игнорируя контрольную точку.'
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['format'] or self.guess_format(path)
+        checkpoint = Checkpoint(
+            options['checkpoint'] or f'{path}.checkpoint'
+        )
+        state = None if options['restart'] else checkpoint.load()
+        if state and state['model'] != options['model']:
+            raise CommandError(
+                f'Контрольная точка {checkpoint.path} относится к импорту '
+                f'{state["model"]}; используйте --restart'
+            )
+        offset = state['offset'] if state else 0
+        if offset:
+            self.stdout.write(f'Продолжаем с байта {offset}')
+        size = os.path.getsize(path)
+        start = perf_counter()
+
+        def progress(position, stats):
+            if options['verbosity'] < 1:
+                return
+            done = position - offset
+            rate = done / max(perf_counter() - start, 1e-9)
+            self.stdout.write(
+                f'{position / max(size, 1):>6.1%}  '
+                f'записано {stats["записано"]}  '
+                f'{rate / 1024 / 1024:.1f} МБ/с'
+            )
+
+        importer = Importer(
+            options['model'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            create_missing=options['create_missing'],
+            progress=progress,
+        )
+        stats = importer.run(
+            read_records(path, file_format, offset), checkpoint, state
+        )
+        checkpoint.clear()
+        for name, value in sorted(stats.items()):
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершён за {perf_counter() - start:.1f} с'
+        ))
+
+    @staticmethod
+    def guess_format(path):
+        extension = os.path.splitext(path)[1].lower().lstrip('.')
+        if extension in ('jsonl', 'ndjson'):
+            return 'jsonl'
+        if extension == 'csv':
+            return 'csv'
+        raise CommandError('Не удалось определить формат: укажите --format')
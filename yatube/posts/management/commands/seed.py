@@ -0,0 +1,59 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, '
+        'подписками, постами и комментариями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=10,
+            help='Сколько авторов в среднем читает пользователь.'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.0,
+            help='Показатель степенного закона популярности авторов.'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.0,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и слагов групп.'
+        )
+        parser.add_argument('--password', default='password')
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        progress = None
+        if options['verbosity'] > 1:
+            progress = self.stdout.write
+        seeder = Seeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            progress=progress,
+        )
+        seeder.users(
+            options['users'], options['password'], options['alpha']
+        )
+        seeder.groups(options['groups'])
+        seeder.follows(options['follows_per_user'])
+        seeder.posts(options['posts'], image_ratio=options['image_ratio'])
+        seeder.comments(options['comments'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {perf_counter() - start:.1f} с'
+        ))
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from core.identity import IdentityManager
+
 User = get_user_model()
 
 
@@ -9,6 +11,8 @@ class Group(models.Model):
     slug = models.SlugField(unique=True, max_length=50)
     description = models.TextField()
 
+    objects = IdentityManager()
+
     def __str__(self):
         return self.title
 
@@ -43,9 +47,29 @@ class Post(models.Model):
         blank=True,
     )
 
+    objects = IdentityManager()
+
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа и автор на момент загрузки: сигналы сбрасывают
+        # страницы и прежних, если пост перенесли.
+        instance.loaded_relations = {
+            name: instance.__dict__[name]
+            for name in ('group_id', 'author_id')
+            if name in instance.__dict__
+        }
+        return instance
+
+    def related_ids(self, name):
+        """Текущее и загруженное из БД значения ключа name."""
+        ids = {getattr(self, name)}
+        ids.add(getattr(self, 'loaded_relations', {}).get(name))
+        return ids - {None}
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
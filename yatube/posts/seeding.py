@@ -0,0 +1,190 @@
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post, User
+from .sitemaps import mark_dirty, shards_between, shards_for
+
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+WORDS = (
+    'яндекс', 'практикум', 'django', 'пост', 'группа', 'лента',
+    'подписка', 'комментарий', 'автор', 'страница', 'кеш', 'шаблон',
+    'запрос', 'ответ', 'база', 'данные', 'тест', 'код', 'python', 'день',
+)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+@contextmanager
+def explicit_dates(model, field_name):
+    """Позволяет задать дату вручную, несмотря на auto_now_add."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def explicit_pub_date():
+    return explicit_dates(Post, 'pub_date')
+
+
+class Seeder:
+    """Детерминированный генератор синтетических данных.
+
+    Объекты создаются генераторами и пишутся пачками через
+    bulk_create, каждая пачка в своей транзакции, поэтому
+    расход памяти не зависит от объёма данных.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, prefix='seed',
+                 progress=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.progress = progress or (lambda message: None)
+        self.user_ids = []
+        self.group_ids = []
+        self.post_range = None
+        self.cum_weights = None
+
+    def insert(self, model, objects, total):
+        """Пишет объекты пачками и возвращает диапазон их pk.
+
+        SQLite не возвращает pk из bulk_create, поэтому диапазон
+        вычисляется по максимальному pk: вставки одного процесса
+        получают последовательные идентификаторы.
+        """
+        done = 0
+        for chunk in chunked(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            done += len(chunk)
+            self.progress(f'{model.__name__}: {done}/{total}')
+        last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        return last - done + 1, last
+
+    def pick_author(self):
+        """Автор с вероятностью по степенному закону (закон Ципфа)."""
+        return self.rng.choices(
+            self.user_ids, cum_weights=self.cum_weights
+        )[0]
+
+    def users(self, count, password='password', alpha=1.0):
+        password = make_password(password)
+        first, _ = self.insert(User, (
+            User(username=f'{self.prefix}{i}', password=password)
+            for i in range(count)
+        ), count)
+        self.user_ids = list(
+            User.objects.filter(pk__gte=first)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        self.cum_weights = list(accumulate(
+            1 / (rank + 1) ** alpha for rank in range(len(self.user_ids))
+        ))
+
+    def groups(self, count):
+        first, _ = self.insert(Group, (
+            Group(
+                title=f'Группа {self.prefix} {i}',
+                slug=f'{self.prefix}-{i}',
+                description=f'Описание группы {i}',
+            )
+            for i in range(count)
+        ), count)
+        self.group_ids = list(
+            Group.objects.filter(pk__gte=first).values_list('pk', flat=True)
+        )
+
+    def follows(self, per_user):
+        def generate():
+            for follower in self.user_ids:
+                authors = set(self.rng.choices(
+                    self.user_ids, cum_weights=self.cum_weights, k=per_user
+                ))
+                authors.discard(follower)
+                for author in sorted(authors):
+                    yield Follow(user_id=follower, author_id=author)
+        self.insert(Follow, generate(), len(self.user_ids) * per_user)
+
+    def images(self, count):
+        from PIL import Image
+
+        names = []
+        for i in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 339), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}_{i}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def posts(self, count, group_ratio=0.7, image_ratio=0.0, days=365):
+        images = self.images(10) if image_ratio else []
+        start = EPOCH
+        step = timedelta(days=days) / max(count, 1)
+
+        def generate():
+            for i in range(count):
+                yield Post(
+                    text=f'Пост {i}. ' + ' '.join(
+                        self.rng.choice(WORDS)
+                        for _ in range(self.rng.randint(5, 60))
+                    ),
+                    pub_date=start + step * i,
+                    author_id=self.pick_author(),
+                    group_id=(
+                        self.rng.choice(self.group_ids)
+                        if self.group_ids and self.rng.random() < group_ratio
+                        else None
+                    ),
+                    image=(
+                        self.rng.choice(images)
+                        if images and self.rng.random() < image_ratio
+                        else ''
+                    ),
+                )
+        with explicit_pub_date():
+            self.post_range = self.insert(Post, generate(), count)
+        first, last = self.post_range
+        if first <= last:
+            # bulk_create не шлёт сигналов: шарды карты сайта
+            # с новыми постами, их авторами и группами помечаем сами.
+            mark_dirty(
+                *shards_between('posts', first, last),
+                *shards_for('profiles', self.user_ids),
+                *shards_for('groups', self.group_ids),
+            )
+
+    def comments(self, count):
+        if not self.post_range or self.post_range[0] > self.post_range[1]:
+            return
+        first, last = self.post_range
+        self.insert(Comment, (
+            Comment(
+                text=f'Комментарий {i}',
+                post_id=self.rng.randint(first, last),
+                author_id=self.rng.choice(self.user_ids),
+            )
+            for i in range(count)
+        ), count)
@@ -0,0 +1,102 @@
+from itertools import islice
+
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.surrogate import purge
+
+from .models import Comment, Group, Post, User
+from .sitemaps import mark_dirty, shard_name
+
+# Вариант фрагмента: '0' — с автором (ленты), '1' — без автора (профиль).
+ARTICLE_VARIANTS = ('0', '1')
+
+
+def post_article_keys(post_ids):
+    return [
+        make_template_fragment_key('post_article', [post_id, variant])
+        for post_id in post_ids
+        for variant in ARTICLE_VARIANTS
+    ]
+
+
+def invalidate_articles(posts):
+    """Сбрасывает фрагменты постов из queryset пачками."""
+    post_ids = posts.values_list('pk', flat=True).iterator()
+    chunk = list(islice(post_ids, 500))
+    while chunk:
+        # Фрагменты кешируются тегом guarded_cache: сброс через purge
+        # не даёт рендерингу, начатому до правки, сохранить старую версию.
+        purge(*post_article_keys(chunk))
+        chunk = list(islice(post_ids, 500))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_article(sender, instance, **kwargs):
+    purge(*post_article_keys([instance.pk]))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_articles(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_articles(instance.posts)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_articles(sender, instance, created,
+                               update_fields=None, **kwargs):
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_articles(instance.posts)
+    purge(f'author-{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    purge(
+        'posts',
+        f'post-{instance.pk}',
+        *(f'author-{pk}' for pk in instance.related_ids('author_id')),
+        *(f'group-{pk}' for pk in instance.related_ids('group_id')),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    purge(f'post-{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    purge('posts', f'group-{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def mark_post_sitemaps(sender, instance, **kwargs):
+    mark_dirty(
+        shard_name('posts', instance.pk),
+        *(shard_name('profiles', pk)
+          for pk in instance.related_ids('author_id')),
+        *(shard_name('groups', pk)
+          for pk in instance.related_ids('group_id')),
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def mark_group_sitemaps(sender, instance, **kwargs):
+    mark_dirty(shard_name('groups', instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_profile_sitemaps(sender, instance, update_fields=None, **kwargs):
+    if update_fields == frozenset({'last_login'}):
+        return
+    mark_dirty(shard_name('profiles', instance.pk))
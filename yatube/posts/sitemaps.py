@@ -0,0 +1,221 @@
+import gzip
+import os
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+SHARD_RE = re.compile(r'^(posts|profiles|groups)-(\d+)$')
+INDEX_NAME = 'sitemap.xml'
+
+
+def shard_size():
+    return settings.SITEMAP_SHARD_SIZE
+
+
+def shard_name(kind, pk):
+    """Шард, в который попадает объект: диапазоны pk по shard_size."""
+    if pk is None:
+        return None
+    return f'{kind}-{(pk - 1) // shard_size()}'
+
+
+def shards_for(kind, pks):
+    """Шарды, в которые попадают объекты с этими pk."""
+    return {shard_name(kind, pk) for pk in pks} - {None}
+
+
+def shards_between(kind, first, last):
+    """Шарды, покрывающие диапазон pk от first до last."""
+    return {
+        f'{kind}-{number}'
+        for number in range(
+            (first - 1) // shard_size(), (last - 1) // shard_size() + 1
+        )
+    }
+
+
+def shard_path(name):
+    return os.path.join(settings.SITEMAP_ROOT, f'{name}.xml.gz')
+
+
+def dirty_dir():
+    return os.path.join(settings.SITEMAP_ROOT, 'dirty')
+
+
+def mark_dirty(*names):
+    """Помечает шарды для пересборки пустыми файлами-маркерами.
+
+    Маркеры — файлы, а не записи в кеше, чтобы их видела команда
+    build_sitemaps из другого процесса. Пока карта сайта ни разу
+    не собиралась, помечать нечего.
+    """
+    directory = dirty_dir()
+    if not os.path.isdir(directory):
+        return
+    for name in names:
+        if name:
+            open(os.path.join(directory, name), 'a').close()
+
+
+def dirty_shards():
+    directory = dirty_dir()
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory) if SHARD_RE.match(name)
+    )
+
+
+def shard_entries(name):
+    """Пары (путь, lastmod) для URL шарда."""
+    kind, number = SHARD_RE.match(name).groups()
+    low = int(number) * shard_size() + 1
+    high = low + shard_size() - 1
+    if kind == 'posts':
+        rows = Post.objects.filter(pk__range=(low, high)).order_by(
+            'pk'
+        ).values_list('pk', 'pub_date')
+        for pk, lastmod in rows.iterator():
+            yield reverse('posts:post_detail', kwargs={'post_id': pk}), lastmod
+        return
+    if kind == 'profiles':
+        model, field, url_name, kwarg = (
+            User, 'username', 'posts:profile', 'username'
+        )
+    else:
+        model, field, url_name, kwarg = (
+            Group, 'slug', 'posts:group_list', 'slug'
+        )
+    rows = model.objects.filter(pk__range=(low, high)).annotate(
+        lastmod=Max('posts__pub_date')
+    ).filter(lastmod__isnull=False).order_by('pk').values_list(
+        field, 'lastmod'
+    )
+    for value, lastmod in rows.iterator():
+        yield reverse(url_name, kwargs={kwarg: value}), lastmod
+
+
+def write_atomic(path, lines, compress):
+    temporary = f'{path}.tmp'
+    opener = gzip.open if compress else open
+    with opener(temporary, 'wt', encoding='utf-8') as output:
+        output.writelines(lines)
+    os.replace(temporary, path)
+
+
+def build_shard(name):
+    """Пересобирает шард; возвращает число URL (0 — шард удалён).
+
+    Время изменения файла — момент сборки: по нему строятся индекс
+    и заголовок Last-Modified. Самый свежий lastmod для этого не
+    годится — удаление URL его не меняет. Каждая пересборка сдвигает
+    время хотя бы на секунду, чтобы If-Modified-Since её заметил.
+    """
+    base = settings.SITEMAP_BASE_URL.rstrip('/')
+    count = 0
+
+    def lines():
+        nonlocal count
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield (
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for path, lastmod in shard_entries(name):
+            count += 1
+            yield (
+                f'<url><loc>{escape(base + path)}</loc>'
+                f'<lastmod>{lastmod.date().isoformat()}</lastmod></url>\n'
+            )
+        yield '</urlset>\n'
+
+    path = shard_path(name)
+    try:
+        previous = int(os.path.getmtime(path))
+    except FileNotFoundError:
+        previous = 0
+    write_atomic(path, lines(), compress=True)
+    if not count:
+        os.remove(path)
+        return 0
+    timestamp = max(time.time(), previous + 1)
+    os.utime(path, (timestamp, timestamp))
+    return count
+
+
+def build_index():
+    base = settings.SITEMAP_BASE_URL.rstrip('/')
+    names = sorted(
+        (filename[:-len('.xml.gz')]
+         for filename in os.listdir(settings.SITEMAP_ROOT)
+         if filename.endswith('.xml.gz')
+         and SHARD_RE.match(filename[:-len('.xml.gz')])),
+        key=lambda name: (name.split('-')[0], int(name.split('-')[1])),
+    )
+
+    def lines():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield (
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for name in names:
+            lastmod = datetime.fromtimestamp(
+                os.path.getmtime(shard_path(name)), dt_timezone.utc
+            )
+            url = base + reverse('sitemap_shard', kwargs={'name': name})
+            yield (
+                f'<sitemap><loc>{escape(url)}</loc>'
+                f'<lastmod>{lastmod.date().isoformat()}</lastmod></sitemap>\n'
+            )
+        yield '</sitemapindex>\n'
+
+    write_atomic(
+        os.path.join(settings.SITEMAP_ROOT, INDEX_NAME), lines(),
+        compress=False,
+    )
+    return len(names)
+
+
+def all_shards():
+    names = []
+    for kind, model in (('posts', Post), ('profiles', User),
+                        ('groups', Group)):
+        last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        names.extend(
+            f'{kind}-{number}'
+            for number in range((last + shard_size() - 1) // shard_size())
+        )
+    return names
+
+
+def build(full=False, progress=None):
+    """Пересобирает помеченные шарды (или все) и индекс.
+
+    Маркер удаляется до сборки шарда: изменения, пришедшие
+    во время сборки, снова пометят шард.
+    """
+    progress = progress or (lambda message: None)
+    os.makedirs(dirty_dir(), exist_ok=True)
+    index = os.path.join(settings.SITEMAP_ROOT, INDEX_NAME)
+    full = full or not os.path.exists(index)
+    names = all_shards() if full else dirty_shards()
+    for name in names:
+        marker = os.path.join(dirty_dir(), name)
+        if os.path.exists(marker):
+            os.remove(marker)
+        progress(f'{name}: {build_shard(name)} URL')
+    if full:
+        for filename in os.listdir(settings.SITEMAP_ROOT):
+            name = filename[:-len('.xml.gz')]
+            if filename.endswith('.xml.gz') and name not in names:
+                os.remove(os.path.join(settings.SITEMAP_ROOT, filename))
+    if full or names:
+        build_index()
+    return names
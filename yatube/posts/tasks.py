@@ -0,0 +1,29 @@
+from sorl.thumbnail import get_thumbnail
+
+from jobs.registry import task
+
+from .models import Post
+
+# Те же параметры, что у {% thumbnail %} в шаблонах постов: тогда
+# шаблон найдёт готовую миниатюру в хранилище sorl.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task()
+def warm_thumbnails(post_id):
+    """Заранее создаёт миниатюру картинки поста."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+def schedule_thumbnails(post):
+    """Ставит прогрев миниатюр в очередь; ключ — пост и имя файла."""
+    if post.image:
+        warm_thumbnails.enqueue(
+            payload={'post_id': post.pk},
+            priority=10,
+            key=f'thumbnails:{post.pk}:{post.image.name}',
+        )
@@ -0,0 +1,289 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase
+
+from ..management.commands.benchmark import ROUTES
+from ..models import Comment, Follow, Group, Post, User
+
+
+class SeedCommandTest(TestCase):
+    def seed(self, **options):
+        call_command(
+            'seed', users=20, groups=3, posts=50, comments=30,
+            follows_per_user=5, batch_size=7, verbosity=0, **options
+        )
+
+    def test_seed_creates_objects(self):
+        """Проверяем, что seed создаёт заданное число объектов"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists()
+        )
+
+    def test_seed_is_deterministic(self):
+        """Проверяем, что одинаковый seed даёт одинаковые данные"""
+        self.seed(seed=42)
+        first = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'pub_date'
+        ))
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+        self.seed(seed=42)
+        second = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'pub_date'
+        ))
+        self.assertEqual(first, second)
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='legacy')
+        cls.group = Group.objects.create(
+            title='Группа', slug='legacy-group', description='Описание'
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def import_posts(self, path, **options):
+        call_command(
+            'import_posts', path, verbosity=0, stdout=io.StringIO(),
+            **options
+        )
+
+    def test_jsonl_keeps_ids_and_maps_references(self):
+        """Проверяем, что id сохраняются, а автор и группа ищутся по имени"""
+        records = [
+            {'id': 500, 'text': 'Первый', 'author': 'legacy',
+             'group': 'legacy-group', 'pub_date': '2015-03-01T10:00:00'},
+            {'id': 501, 'text': 'Второй', 'author': 'legacy'},
+            {'id': 502, 'text': 'Чужой', 'author': 'nobody'},
+            {'id': 503, 'text': '', 'author': 'legacy'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        ) + '\nне json\n')
+        self.import_posts(path, chunk_size=2)
+        self.import_posts(path, chunk_size=2)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author__username', 'group__slug'
+            )),
+            [(500, 'legacy', 'legacy-group'), (501, 'legacy', None)],
+        )
+        self.assertEqual(
+            Post.objects.get(pk=500).pub_date.year, 2015
+        )
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_stats_count_inserted_rows(self):
+        """Проверяем, что уже имеющиеся записи не считаются записанными"""
+        records = [
+            {'id': 600, 'text': 'Первый', 'author': 'legacy'},
+            {'id': 600, 'text': 'Дубль', 'author': 'legacy'},
+            {'id': 601, 'text': 'Второй', 'author': 'legacy'},
+            {'text': 'Без id', 'author': 'legacy'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        ))
+        for expected in (
+            ['записано: 3', 'пропущено (уже есть): 1'],
+            ['записано: 1', 'пропущено (уже есть): 3'],
+        ):
+            stdout = io.StringIO()
+            call_command('import_posts', path, verbosity=0, stdout=stdout)
+            for line in expected:
+                self.assertIn(line, stdout.getvalue().splitlines())
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_create_missing(self):
+        """Проверяем, что --create-missing создаёт авторов и группы"""
+        path = self.write('posts.jsonl', json.dumps(
+            {'id': 7, 'text': 'Пост', 'author': 'new', 'group': 'new-group'}
+        ))
+        self.import_posts(path, create_missing=True)
+        post = Post.objects.get(pk=7)
+        self.assertEqual(post.author.username, 'new')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.group.slug, 'new-group')
+
+    def test_csv_resumes_from_checkpoint(self):
+        """Проверяем, что после сбоя импорт продолжается с последней пачки"""
+        rows = ['id,text,author,group']
+        rows += [
+            f'{pk},"Пост {pk}\nвторая строка",legacy,legacy-group'
+            for pk in range(1, 8)
+        ]
+        path = self.write('posts.csv', '\n'.join(rows) + '\n')
+        original = Post.objects.bulk_create
+        calls = []
+
+        def failing(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('сбой')
+            return original(*args, **kwargs)
+
+        with mock.patch.object(Post.objects, 'bulk_create', failing):
+            with self.assertRaises(RuntimeError):
+                self.import_posts(path, chunk_size=3)
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertTrue(os.path.exists(f'{path}.checkpoint'))
+        with mock.patch.object(
+            Post.objects, 'bulk_create', wraps=original
+        ) as bulk_create:
+            self.import_posts(path, chunk_size=3)
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(
+            Post.objects.get(pk=7).text, 'Пост 7\nвторая строка'
+        )
+
+    def test_comments_skip_unknown_posts(self):
+        """Проверяем, что комментарии к отсутствующим постам пропускаются"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        records = (
+            {'id': 1, 'post': post.pk, 'text': 'Есть', 'author': 'legacy'},
+            {'id': 2, 'post': 9999, 'text': 'Нет', 'author': 'legacy'},
+        )
+        path = self.write('comments.jsonl', '\n'.join(
+            json.dumps(record) for record in records
+        ))
+        self.import_posts(path, model='comment')
+        self.assertEqual(
+            list(Comment.objects.values_list('pk', 'post_id')),
+            [(1, post.pk)],
+        )
+
+
+class ExportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='export-group', description='Описание'
+        )
+        for i in range(5):
+            Post.objects.create(
+                text=f'Пост {i}\nс переводом строки', author=cls.author,
+                group=cls.group if i % 2 else None,
+            )
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'export')
+
+    def export(self, **options):
+        call_command('export_posts', output=self.path, **options)
+        with open(self.path, 'rb') as source:
+            return source.read()
+
+    def test_filters_and_keyset_chunks(self):
+        """Проверяем, что фильтры работают, а обход по pk не теряет строк"""
+        lines = self.export(author='author', chunk_size=2).splitlines()
+        self.assertEqual(len(lines), 5)
+        ids = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(ids, sorted(ids))
+        lines = self.export(group='export-group').splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_roundtrip_through_import(self):
+        """Проверяем, что CSV-выгрузка загружается обратно import_posts"""
+        self.export(format='csv', gzip=True)
+        with gzip.open(self.path, 'rb') as source:
+            data = source.read()
+        expected = list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'author_id', 'group_id', 'pub_date'
+        ))
+        Post.objects.all().delete()
+        csv_path = f'{self.path}.csv'
+        with open(csv_path, 'wb') as output:
+            output.write(data)
+        call_command('import_posts', csv_path, verbosity=0,
+                     stdout=io.StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'author_id', 'group_id', 'pub_date'
+            )),
+            expected,
+        )
+
+    def test_follows(self):
+        """Проверяем, что подписки выгружаются с именами пользователей"""
+        line = self.export(model='follow')
+        self.assertEqual(
+            json.loads(line)['author'], 'author'
+        )
+        with self.assertRaises(CommandError):
+            self.export(model='follow', since='2022-01-01')
+
+
+# Тестовые база и окружение уже подготовлены раннером: команде
+# не нужно создавать свои.
+@mock.patch.multiple(
+    'posts.management.commands.benchmark',
+    setup_test_environment=mock.DEFAULT, setup_databases=mock.DEFAULT,
+    teardown_databases=mock.DEFAULT, teardown_test_environment=mock.DEFAULT,
+)
+class BenchmarkCommandTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'results.json')
+        self.baseline = os.path.join(directory.name, 'baseline.json')
+
+    def benchmark(self, *args):
+        stdout = io.StringIO()
+        call_command(
+            'benchmark', '--scales', '20', '--requests', '2',
+            '--output', self.output, '--baseline', self.baseline,
+            *args, stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_report(self, **mocks):
+        """Проверяем, что отчёт содержит замеры всех маршрутов"""
+        stdout = self.benchmark()
+        self.assertIn('Базовая линия', stdout)
+        with open(self.output, encoding='utf-8') as source:
+            results = json.load(source)
+        self.assertEqual(set(results), {'20'})
+        self.assertEqual(set(results['20']), set(ROUTES))
+        for name, row in results['20'].items():
+            with self.subTest(name=name):
+                self.assertLessEqual(row['p50'], row['p99'])
+                self.assertGreater(row['queries'], 0)
+        self.assertIn('kb', results['20']['index'])
+        self.assertIn(f'\n{"index":<18}', stdout)
+
+    def test_regression_against_baseline(self, **mocks):
+        """Проверяем, что рост p95 сверх допуска — ошибка команды"""
+        self.benchmark('--save-baseline')
+        self.assertTrue(os.path.exists(self.baseline))
+        with self.assertRaisesMessage(CommandError, 'Регрессии'):
+            self.benchmark('--tolerance', '-1')
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост для ленты', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.urls = {
+            reverse('posts:feed_rss'): 'application/rss+xml',
+            reverse('posts:feed_atom'): 'application/atom+xml',
+            reverse('posts:group_feed_rss', kwargs={'slug': 'test-slug'}):
+                'application/rss+xml',
+            reverse('posts:group_feed_atom', kwargs={'slug': 'test-slug'}):
+                'application/atom+xml',
+            reverse('posts:profile_feed_rss', kwargs={'username': 'author'}):
+                'application/rss+xml',
+            reverse('posts:profile_feed_atom', kwargs={'username': 'author'}):
+                'application/atom+xml',
+        }
+
+    def test_feeds(self):
+        """Проверяем, что все ленты отдают пост нужного формата"""
+        for url, content_type in self.urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertIn('Пост для ленты', response.content.decode())
+
+    def test_unknown_group(self):
+        """Проверяем, что лента несуществующей группы отдаёт 404"""
+        response = self.client.get(
+            reverse('posts:group_feed_rss', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_cached_feed_skips_database(self):
+        """Проверяем, что повторный запрос ленты не обращается к БД"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+
+    def test_new_post_purges_feeds(self):
+        """Проверяем, что новый пост сбрасывает кеш лент"""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertIn(
+                    'Свежий пост', self.client.get(url).content.decode()
+                )
+
+    def test_conditional_get(self):
+        """Проверяем, что ETag даёт 304, а Last-Modified не отдаётся"""
+        url = reverse('posts:feed_rss')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            304,
+        )
+
+    def test_edited_post_not_modified_stale(self):
+        """Проверяем, что после правки поста старый ETag не даёт 304"""
+        url = reverse('posts:feed_rss')
+        etag = self.client.get(url)['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Исправленный пост', response.content.decode())
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Проверяем, что перенос поста сбрасывает ленту прежней группы"""
+        url = reverse('posts:group_feed_rss', kwargs={'slug': 'test-slug'})
+        self.assertIn('Пост для ленты', self.client.get(url).content.decode())
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = None
+        post.save()
+        self.assertNotIn(
+            'Пост для ленты', self.client.get(url).content.decode()
+        )
@@ -8,6 +8,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
 from django.db.models.fields.files import ImageFieldFile
 
+from jobs.models import Job
+
 from ..models import Post, Group
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -85,6 +87,9 @@ class TaskCreateFormTests(TestCase):
         self.assertEqual(new_post.group, self.post.group)
         self.assertEqual(new_post.image.name, 'posts/small.gif')
         self.assertIsInstance(new_post.image, ImageFieldFile)
+        self.assertTrue(Job.objects.filter(
+            task='posts.warm_thumbnails', payload__contains=str(new_post.pk)
+        ).exists())
 
     def test_post_img_context(self):
         pages_with_img = (
@@ -0,0 +1,210 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..sitemaps import build, dirty_shards
+
+User = get_user_model()
+
+
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings = override_settings(
+            SITEMAP_ROOT=self.root,
+            SITEMAP_SHARD_SIZE=2,
+            SITEMAP_BASE_URL='http://testserver',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def read_shard(self, name):
+        path = os.path.join(self.root, f'{name}.xml.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            return source.read()
+
+    def shard_of(self, post):
+        return f'posts-{(post.pk - 1) // 2}'
+
+    def test_full_build(self):
+        """Проверяем, что первая сборка создаёт индекс и все шарды"""
+        call_command('build_sitemaps', stdout=io.StringIO())
+        with open(os.path.join(self.root, 'sitemap.xml')) as source:
+            index = source.read()
+        for post in self.posts:
+            shard = self.shard_of(post)
+            self.assertIn(f'/sitemap-{shard}.xml.gz', index)
+            self.assertIn(
+                f'http://testserver/posts/{post.pk}/</loc><lastmod>'
+                f'{post.pub_date.date().isoformat()}',
+                self.read_shard(shard),
+            )
+        self.assertIn('/profile/author/', self.read_shard(
+            f'profiles-{(self.author.pk - 1) // 2}'
+        ))
+        self.assertIn('/group/test-slug/', self.read_shard(
+            f'groups-{(self.group.pk - 1) // 2}'
+        ))
+
+    def test_markers_only_after_first_build(self):
+        """Проверяем, что без собранной карты маркеры не пишутся"""
+        Post.objects.create(text='Новый', author=self.author)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'dirty')))
+
+    def test_incremental_build(self):
+        """Проверяем, что пересобираются только изменённые шарды"""
+        build()
+        post = self.posts[0]
+        post.text = 'Изменённый'
+        post.save()
+        expected = sorted([
+            self.shard_of(post),
+            f'profiles-{(self.author.pk - 1) // 2}',
+            f'groups-{(self.group.pk - 1) // 2}',
+        ])
+        self.assertEqual(dirty_shards(), expected)
+        self.assertEqual(build(), expected)
+        self.assertEqual(dirty_shards(), [])
+        self.assertEqual(build(), [])
+
+    def test_moved_post_marks_both_groups(self):
+        """Проверяем, что перенос поста помечает шарды обеих групп"""
+        build()
+        for slug in ('filler-1', 'filler-2', 'other'):
+            other = Group.objects.create(
+                title=slug, slug=slug, description='Описание'
+            )
+        for name in dirty_shards():
+            os.remove(os.path.join(self.root, 'dirty', name))
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.group = other
+        post.save()
+        dirty = dirty_shards()
+        self.assertIn(f'groups-{(self.group.pk - 1) // 2}', dirty)
+        self.assertIn(f'groups-{(other.pk - 1) // 2}', dirty)
+
+    def test_import_marks_shards(self):
+        """Проверяем, что импорт постов помечает шарды карты сайта"""
+        build()
+        other = User.objects.create_user(username='imported')
+        last = Post.objects.latest('pk').pk
+        records = (
+            {'id': last + 10, 'text': 'С id', 'author': 'imported'},
+            {'text': 'Без id', 'author': 'author', 'group': 'test-slug'},
+        )
+        path = os.path.join(self.root, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write('\n'.join(json.dumps(record) for record in records))
+        call_command('import_posts', path, verbosity=0, stdout=io.StringIO())
+        new = Post.objects.get(text='Без id')
+        dirty = dirty_shards()
+        for name in (
+            f'posts-{(last + 9) // 2}', self.shard_of(new),
+            f'profiles-{(other.pk - 1) // 2}',
+            f'profiles-{(self.author.pk - 1) // 2}',
+            f'groups-{(self.group.pk - 1) // 2}',
+        ):
+            self.assertIn(name, dirty)
+
+    def test_seed_marks_shards(self):
+        """Проверяем, что seed помечает шарды новых постов"""
+        build()
+        last = Post.objects.latest('pk').pk
+        call_command(
+            'seed', users=3, groups=1, posts=5, comments=0,
+            follows_per_user=0, verbosity=0, stdout=io.StringIO(),
+        )
+        dirty = dirty_shards()
+        for post in Post.objects.filter(pk__gt=last):
+            self.assertIn(self.shard_of(post), dirty)
+            self.assertIn(f'profiles-{(post.author_id - 1) // 2}', dirty)
+
+    def test_deleted_posts_leave_shard(self):
+        """Проверяем, что опустевший шард удаляется из индекса"""
+        build()
+        post = self.posts[-1]
+        shard = self.shard_of(post)
+        Post.objects.filter(
+            pk__gte=(post.pk - 1) // 2 * 2 + 1
+        ).delete()
+        build()
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, f'{shard}.xml.gz'))
+        )
+        with open(os.path.join(self.root, 'sitemap.xml')) as source:
+            self.assertNotIn(shard, source.read())
+
+    def test_rebuilt_shard_modified(self):
+        """Проверяем, что после удаления поста шард не отдаётся как 304"""
+        build()
+        client = Client()
+        post = self.posts[0]
+        url = reverse('sitemap_shard', kwargs={'name': self.shard_of(post)})
+        response = client.get(url)
+        b''.join(response.streaming_content)
+        Post.objects.filter(pk=post.pk).delete()
+        build()
+        for header, value in (
+            ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+            ('HTTP_IF_NONE_MATCH', response['ETag']),
+        ):
+            with self.subTest(header=header):
+                fresh = client.get(url, **{header: value})
+                self.assertEqual(fresh.status_code, 200)
+                self.assertNotIn(
+                    f'/posts/{post.pk}/'.encode(),
+                    gzip.decompress(b''.join(fresh.streaming_content)),
+                )
+
+    def test_views(self):
+        """Проверяем, что карта отдаётся из готовых файлов"""
+        client = Client()
+        self.assertEqual(client.get(reverse('sitemap')).status_code, 404)
+        build()
+        response = client.get(reverse('sitemap'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<sitemapindex', b''.join(response.streaming_content))
+        shard = self.shard_of(self.posts[0])
+        response = client.get(
+            reverse('sitemap_shard', kwargs={'name': shard})
+        )
+        self.assertEqual(response['Content-Type'], 'application/x-gzip')
+        self.assertIn(
+            b'<urlset',
+            gzip.decompress(b''.join(response.streaming_content)),
+        )
+        not_modified = client.get(
+            reverse('sitemap_shard', kwargs={'name': shard}),
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(client.get(
+            reverse('sitemap_shard', kwargs={'name': shard}),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code, 304)
+        self.assertEqual(client.get(
+            reverse('sitemap_shard', kwargs={'name': '..-1'})
+        ).status_code, 404)
@@ -1,8 +1,13 @@
+import gzip
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.paginator import Paginator
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
 
+from core.templatetags.pagination import page_window
+
 from ..forms import PostForm
 from ..models import Post, Group, Comment, Follow
 
@@ -104,6 +109,44 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(response.context['page_obj']), 3)
 
 
+class WindowedPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {i}', author=cls.author)
+            for i in range(13)
+        )
+
+    def test_page_window(self):
+        """Проверяем окно страниц с разрывами"""
+        paginator = Paginator(range(100000), 10)
+        self.assertEqual(
+            page_window(paginator.page(500)),
+            [1, None, 498, 499, 500, 501, 502, None, 10000]
+        )
+        self.assertEqual(
+            page_window(paginator.page(1)), [1, 2, 3, None, 10000]
+        )
+
+    @override_settings(POSTS_COUNTLESS_PAGINATION=True)
+    def test_countless_pagination(self):
+        """Проверяем пагинацию без подсчёта записей"""
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertIsNone(page_obj.paginator.count)
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+        response = self.client.get(reverse('posts:index'), {'page': 2})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 3)
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(page_obj.end_index(), 13)
+
+
 class ContextViewsTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -420,3 +463,101 @@ class FollowTest(TestCase):
         """Проверка, что страница 404 отдает кастомный шаблон"""
         response = self.authorized_client.get('unexisting_page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class PostFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовое описание группы',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_group_page(self, slug='test-slug'):
+        return self.client.get(
+            reverse('posts:group_list', kwargs={'slug': slug})
+        ).content.decode()
+
+    def test_article_fragment_is_cached(self):
+        """Проверяем, что разметка поста берётся из кеша"""
+        self.get_group_page()
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        self.assertIn('Тестовый текст', self.get_group_page())
+
+    def test_post_save_invalidates_fragment(self):
+        """Проверяем, что сохранение поста сбрасывает его фрагмент"""
+        self.get_group_page()
+        self.post.text = 'Отредактированный текст'
+        self.post.save()
+        self.assertIn('Отредактированный текст', self.get_group_page())
+
+    def test_group_rename_invalidates_fragments(self):
+        """Проверяем, что смена слага группы сбрасывает фрагменты постов"""
+        self.get_group_page()
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.assertIn('/group/new-slug/', self.get_group_page('new-slug'))
+
+    def test_author_rename_invalidates_fragments(self):
+        """Проверяем, что смена имени автора сбрасывает фрагменты постов"""
+        self.get_group_page()
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertIn('/profile/renamed/', self.get_group_page())
+
+
+class ExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+        Post.objects.create(text='Пост для выгрузки', author=cls.user)
+
+    def test_staff_only(self):
+        """Проверяем, что выгрузка доступна только персоналу"""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('export', kwargs={'model': 'post'}))
+        self.assertEqual(response.status_code, 302)
+
+    def test_streams_csv_gzip(self):
+        """Проверяем, что выгрузка отдаётся потоком и сжимается"""
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(
+            reverse('export', kwargs={'model': 'post'}),
+            {'format': 'csv', 'gzip': '1', 'author': 'user'},
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('posts.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn('Пост для выгрузки', content.decode())
+
+    def test_bad_parameters(self):
+        """Проверяем, что неверные параметры дают 400"""
+        client = Client()
+        client.force_login(self.staff)
+        for model, params in (
+            ('user', {}),
+            ('post', {'format': 'xml'}),
+            ('post', {'since': 'вчера'}),
+        ):
+            with self.subTest(model=model, params=params):
+                response = client.get(
+                    reverse('export', kwargs={'model': model}), params
+                )
+                self.assertEqual(response.status_code, 400)
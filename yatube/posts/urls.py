@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -27,4 +27,24 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('feed/rss/', feeds.posts_rss, name='feed_rss'),
+    path('feed/atom/', feeds.posts_atom, name='feed_atom'),
+    path(
+        'group/<slug:slug>/feed/rss/', feeds.group_rss, name='group_feed_rss'
+    ),
+    path(
+        'group/<slug:slug>/feed/atom/',
+        feeds.group_atom,
+        name='group_feed_atom'
+    ),
+    path(
+        'profile/<str:username>/feed/rss/',
+        feeds.author_rss,
+        name='profile_feed_rss'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.author_atom,
+        name='profile_feed_atom'
+    ),
 ]
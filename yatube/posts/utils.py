@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+
+from core.surrogate import add_surrogate_keys
+
+POSTS_PER_PAGE = 10
+
+
+class CountlessPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CountlessPaginator(Paginator):
+    """Пагинатор без SELECT COUNT(*).
+
+    О следующей странице узнаёт по одной лишней строке выборки,
+    поэтому общее число записей и страниц неизвестно.
+    """
+    count = None
+    num_pages = None
+
+    @property
+    def page_range(self):
+        raise TypeError('CountlessPaginator не знает числа страниц')
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return max(number, 1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage('Страница не содержит результатов')
+        return CountlessPage(
+            items[:self.per_page], number, self,
+            has_next=len(items) > self.per_page,
+        )
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except EmptyPage:
+            return self.page(1)
+
+
+def paginate(request, queryset, countless=None):
+    """Страница page_obj для ленты постов.
+
+    countless=None берёт режим из POSTS_COUNTLESS_PAGINATION.
+    """
+    if countless is None:
+        countless = settings.POSTS_COUNTLESS_PAGINATION
+    paginator_class = CountlessPaginator if countless else Paginator
+    paginator = paginator_class(queryset, POSTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def tag_posts(request, posts):
+    """Суррогатные ключи для страницы со списком постов."""
+    keys = set()
+    for post in posts:
+        keys.add(f'post-{post.pk}')
+        keys.add(f'author-{post.author_id}')
+        if post.group_id:
+            keys.add(f'group-{post.group_id}')
+    add_surrogate_keys(request, *keys)
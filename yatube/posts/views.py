@@ -1,62 +1,82 @@
-from django.core.paginator import Paginator
+import os
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import (
+    FileResponse, Http404, HttpResponseBadRequest, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
-
-from .models import Post, User, Group, Follow
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.holes import shared_page_cache
+from core.streaming import stream_render
+from core.surrogate import add_surrogate_keys
+
+from .exporting import CONTENT_TYPES, ExportError, export, filename
+from .lookups import groups, users
+from .models import Post, Follow
+from .sitemaps import INDEX_NAME, SHARD_RE, shard_path
+from .tasks import schedule_thumbnails
 from .forms import PostForm, CommentForm
+from .utils import paginate, tag_posts
 
 
+@shared_page_cache()
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, posts)
+    add_surrogate_keys(request, 'posts')
     context = {
         'page_obj': page_obj,
     }
-    return render(request, template, context)
+    return stream_render(request, template, context)
 
 
+@shared_page_cache()
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
+    group = groups.get_or_404(slug)
     posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, posts)
+    add_surrogate_keys(request, f'group-{group.pk}')
+    tag_posts(request, page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, template, context)
+    return stream_render(request, template, context)
 
 
+@shared_page_cache()
 def profile(request, username):
     template = 'posts/profile.html'
-    user = get_object_or_404(User, username=username)
+    user = users.get_or_404(username)
     posts = Post.objects.filter(author=user)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=user
     ).exists()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, posts, countless=False)
+    add_surrogate_keys(request, f'author-{user.pk}')
+    tag_posts(request, page_obj)
     context = {
         'author': user,
         'page_obj': page_obj,
         'following': following,
     }
-    return render(request, template, context)
+    return stream_render(request, template, context)
 
 
+@shared_page_cache()
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
     posts = Post.objects.all()
     post = posts.get(pk=post_id)
     comments = post.comments.all()
     count_posts_author = posts.filter(author=post.author).count()
+    tag_posts(request, [post])
     form = CommentForm(
         request.POST or None
     )
@@ -66,7 +86,7 @@ def post_detail(request, post_id):
         'form': form,
         'comments': comments,
     }
-    return render(request, template, context)
+    return stream_render(request, template, context)
 
 
 @login_required
@@ -75,7 +95,7 @@ def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        schedule_thumbnails(form.save())
         return redirect('posts:profile', request.user)
     return render(request, template, {'form': form})
 
@@ -92,7 +112,7 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        schedule_thumbnails(form.save())
         return redirect('posts:post_detail', post.id)
     context = {
         'form': form,
@@ -117,18 +137,16 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, posts)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/follow.html', context)
+    return stream_render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = users.get_or_404(username)
     if request.user != author and not Follow.objects.filter(
             user=request.user,
             author=author
@@ -139,7 +157,68 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = users.get_or_404(username)
     if Follow.objects.filter(user=request.user, author=author).exists():
         Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+def export_data(request, model):
+    """Выгрузка для аналитики; доступ — через admin_view в urls."""
+    file_format = request.GET.get('format', 'jsonl')
+    compress = request.GET.get('gzip') in ('1', 'true', 'yes')
+    try:
+        chunks = export(
+            model, file_format, compress,
+            author=request.GET.get('author'),
+            group=request.GET.get('group'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=(
+            'application/gzip' if compress else CONTENT_TYPES[file_format]
+        ),
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename(model, file_format, compress)}"'
+    )
+    return response
+
+
+def serve_sitemap(request, path, content_type):
+    """Отдаёт заранее собранный файл карты сайта.
+
+    Last-Modified — время сборки файла, ETag — его точное время
+    изменения и размер: оба меняются при каждой пересборке.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Карта сайта ещё не собрана')
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime),
+    )
+    if not_modified is not None:
+        return not_modified
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['ETag'] = etag
+    return response
+
+
+def sitemap_index(request):
+    return serve_sitemap(
+        request, os.path.join(settings.SITEMAP_ROOT, INDEX_NAME),
+        'application/xml',
+    )
+
+
+def sitemap_shard(request, name):
+    if not SHARD_RE.match(name):
+        raise Http404
+    return serve_sitemap(request, shard_path(name), 'application/x-gzip')
@@ -12,21 +12,57 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в спул и уходят командой sendmail
+# (или задачей core.send_mail) через EMAIL_SPOOL_BACKEND.
+EMAIL_BACKEND = 'core.backends.mail.SpoolEmailBackend'
+
+EMAIL_SPOOL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+EMAIL_SPOOL_DIR = os.path.join(BASE_DIR, 'mail_spool')
+
+EMAIL_SPOOL_BATCH_SIZE = 50
+
+EMAIL_SPOOL_MAX_ATTEMPTS = 8
+
+EMAIL_SPOOL_RETRY_BACKOFF = 60
+
+EMAIL_SPOOL_RETRY_MAX_DELAY = 3600
+
+EMAIL_SPOOL_LOCK_TIMEOUT = 600
+
+EMAIL_SPOOL_USE_JOBS = False
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
+# Профиль настроек выбирается переменной окружения:
+# development (по умолчанию) или production.
+SETTINGS_PROFILE = os.getenv('DJANGO_SETTINGS_PROFILE', 'development')
+
+PRODUCTION = SETTINGS_PROFILE == 'production'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '+s)mo_n(%0g_5vehme1z83*on+2n*ngfaf1zj%^vyyh2@_wo64'
+# Ключ из репозитория годится только для разработки.
+SECRET_KEY = os.getenv('SECRET_KEY')
+
+if not SECRET_KEY:
+    if PRODUCTION:
+        raise ImproperlyConfigured(
+            'В production задайте переменную окружения SECRET_KEY'
+        )
+    SECRET_KEY = '+s)mo_n(%0g_5vehme1z83*on+2n*ngfaf1zj%^vyyh2@_wo64'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', '0' if PRODUCTION else '1').lower() in (
+    '1', 'true', 'yes'
+)
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
@@ -37,6 +73,9 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+if os.getenv('ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS').split(',')
+
 
 # Application definition
 
@@ -45,6 +84,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -59,10 +99,165 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
     }
 }
 
+# Сессии и пользователь сессии читаются из кеша: страница из кеша
+# отдаётся авторизованному без единого запроса к БД.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['core.backends.auth.CachedModelBackend']
+
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Ленты без SELECT COUNT(*): только ссылки «предыдущая/следующая»
+POSTS_COUNTLESS_PAGINATION = PRODUCTION
+
+# Общий кеш страниц с персональными «дырками» ({% hole %})
+PAGE_CACHE_ENABLED = PRODUCTION
+
+PAGE_CACHE_TIMEOUT = 60
+
+# Полный кеш ответов анонимам со сбросом по суррогатным ключам
+RESPONSE_CACHE_ENABLED = PRODUCTION
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Ленты RSS/Atom; сбрасываются по суррогатным ключам при сохранении поста
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Ограничение частоты запросов на запись: ведро токенов в кеше.
+# Для каждого представления — (ёмкость, период пополнения в секундах)
+# на пользователя и на IP; methods — какие запросы ограничивать.
+RATELIMIT_ENABLED = PRODUCTION
+
+RATELIMITS = {
+    'posts:post_create': {'user': (5, 60), 'ip': (20, 60)},
+    'posts:add_comment': {'user': (10, 60), 'ip': (30, 60)},
+    'posts:profile_follow': {
+        'methods': ('GET', 'POST'),
+        'user': (30, 60),
+        'ip': (60, 60),
+    },
+}
+
+# Приложение за прокси: заголовок с адресом клиента (например,
+# HTTP_X_FORWARDED_FOR) и число прокси, дописывающих в него адрес.
+# Без заголовка все клиенты за прокси делили бы одно ведро по IP.
+# Задавайте, только если до приложения нельзя достучаться мимо прокси.
+RATELIMIT_CLIENT_IP_HEADER = os.getenv('RATELIMIT_CLIENT_IP_HEADER')
+
+RATELIMIT_TRUSTED_PROXIES = int(os.getenv('RATELIMIT_TRUSTED_PROXIES', '1'))
+
+# Фоновые задачи: очередь в БД, выполняет manage.py runworker.
+# Повтор упавшей задачи — через BACKOFF * 2^(попытка-1) секунд.
+JOBS_MAX_ATTEMPTS = 5
+
+JOBS_RETRY_BACKOFF = 30
+
+JOBS_RETRY_MAX_DELAY = 3600
+
+JOBS_POLL_INTERVAL = 1.0
+
+JOBS_CLAIM_BATCH = 10
+
+# Задачи, взятые раньше этого срока и не завершённые, считаются
+# брошенными упавшим обработчиком и возвращаются в очередь.
+JOBS_LOCK_TIMEOUT = 600
+
+# Карта идентичности на время запроса: объекты этих моделей
+# загружаются по pk один раз, одинаковые выборки не повторяются.
+IDENTITY_MAP_ENABLED = False
+
+IDENTITY_MAP_MODELS = ('auth.User', 'posts.Group', 'posts.Post')
+
+# Группы по slug и пользователи по username: LRU в памяти процесса
+# (короткий TTL), за ним общий кеш; сброс — сигналами сохранения.
+LOOKUP_CACHE_ENABLED = PRODUCTION
+
+LOOKUP_CACHE_LOCAL_SIZE = 1024
+
+LOOKUP_CACHE_LOCAL_TTL = 10
+
+LOOKUP_CACHE_TIMEOUT = 3600
+
+# Карта сайта: шарды по 50 000 URL собирает команда build_sitemaps
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+
+SITEMAP_SHARD_SIZE = 50000
+
+SITEMAP_BASE_URL = os.getenv('SITEMAP_BASE_URL', 'http://localhost:8000')
+
+# Сжатие ответов: brotli (если установлен пакет brotli) или gzip
+COMPRESSION_ENABLED = True
+
+COMPRESSION_MIN_LENGTH = 200
+
+COMPRESSION_GZIP_LEVEL = 6
+
+COMPRESSION_BROTLI_QUALITY = 5
+
+COMPRESSION_CACHE_TIMEOUT = RESPONSE_CACHE_TIMEOUT
+
+# Потоковый рендеринг лент: <head> уходит клиенту до конца рендеринга;
+# при промахе кеша страница в него попадает, когда поток отдан целиком.
+# В разработке выключен: тестовый клиент не видит response.context
+# у потоковых ответов.
+STREAMING_RENDER_ENABLED = PRODUCTION
+
+STREAMING_RENDER_MIN_CHUNK = 1024
+
+# Метрики запросов: /metrics в формате Prometheus
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+METRICS_FLUSH_INTERVAL = 10
+
+# Журнал медленных SQL-запросов
+SLOW_QUERY_THRESHOLD = 0.1
+
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+
+SLOW_QUERY_ADMIN_LIMIT = 200
+
+# Значения параметров SQL (там бывают почта и хеши паролей) пишутся
+# только при отладке, иначе — одни их типы.
+SLOW_QUERY_LOG_PARAMS = DEBUG
+
+# Профилирование запросов персоналом: ?_profile=cpu|mem
+PROFILING_RATE = 10
+
+PROFILING_PERIOD = 60
+
+PROFILING_LIMIT = 40
+
+PROFILING_TRACEMALLOC_FRAMES = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.slow_queries.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 LOGIN_URL = 'users:login'
@@ -70,11 +265,18 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 MIDDLEWARE = [
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ratelimit.RateLimitMiddleware',
+    'core.middleware.identity.IdentityMapMiddleware',
+    'core.middleware.profiling.ProfilingMiddleware',
+    'core.middleware.response_cache.AnonymousResponseCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,7 +286,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.backends.templates.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -99,6 +301,17 @@ TEMPLATES = [
     },
 ]
 
+# В production шаблоны минифицируются и разбираются один раз
+# и живут в памяти воркера.
+if PRODUCTION:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'core.loaders.FilesystemLoader',
+            'core.loaders.AppDirectoriesLoader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
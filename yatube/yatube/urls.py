@@ -3,16 +3,34 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics, slow_queries_admin
+from posts.views import export_data, sitemap_index, sitemap_shard
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.permission_denied'
 handler500 = 'core.views.server_error'
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path(
+        'admin/slow-queries/',
+        admin.site.admin_view(slow_queries_admin),
+        name='slow_queries'
+    ),
+    path(
+        'admin/export/<str:model>/',
+        admin.site.admin_view(export_data),
+        name='export'
+    ),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
+    path('sitemap.xml', sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<str:name>.xml.gz', sitemap_shard, name='sitemap_shard'
+    ),
 ]
 
 if settings.DEBUG:
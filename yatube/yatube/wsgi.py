@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Прогрев воркера до первого запроса: URL, шаблоны, sorl-thumbnail и БД.
+if os.environ.get('YATUBE_WARMUP', '').lower() in ('1', 'true', 'yes'):
+    from core.warmup import warm_up
+
+    warm_up()